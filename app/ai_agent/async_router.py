@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.ai_agent import async_service, schemas
+from app.auth.async_service import get_current_user
+from app.auth.models import User
+
+router = APIRouter(prefix="/ai", tags=["ai"])
+
+
+@router.get("/category-suggestions", response_model=list[schemas.CategorySuggestion])
+async def category_suggestions(
+    limit: int = Query(default=500, ge=1, le=5000),
+    min_confidence: float = Query(default=0.0, ge=0.0, le=1.0),
+    current_user: User = Depends(get_current_user),
+):
+    content = await async_service.suggest_categories(current_user, limit, min_confidence)
+    return Response(content, media_type="application/json")
@@ -0,0 +1,25 @@
+"""
+Async entry points for the AI agent service.
+
+Unlike `app.finance.async_service`, calls don't go through `AsyncSession.run_sync`: fitting a
+user's model is CPU-bound and would hold the event loop, so they run with a sync read session on
+the threadpool.
+"""
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.ai_agent import service
+from app.auth.models import User
+from app.core.replica import primary_stickiness
+from app.database import SessionLocal, open_replica_session
+
+
+async def suggest_categories(current_user: User, limit: int, min_confidence: float) -> bytes:
+    def run() -> bytes:
+        replica = None
+        if not primary_stickiness.is_sticky(current_user.id):
+            replica = open_replica_session()
+        with replica or SessionLocal() as db:
+            return service.suggest_categories(db, current_user, limit, min_confidence)
+
+    return await run_in_threadpool(run)
@@ -0,0 +1,336 @@
+"""
+Per-user transaction categorizer.
+
+Each user gets a multinomial naive Bayes model over hashed features of their already-categorized
+descriptions: character trigrams, which survive merchant codes and truncation ("GRABFOOD*8812"),
+plus whole words, with digit runs folded together. Everything runs in process on the CPU.
+
+Models live in a per-process LRU bounded both by count (`CATEGORIZER_CACHE_SIZE`) and by the
+memory their arrays hold (`CATEGORIZER_CACHE_MAX_MB`). The counts are dense (features x classes),
+so a model fitted on 50k rows over 40 categories takes around 12 MB. Models are refreshed
+lazily: a request compares the user's change counter with the sequence the model was trained up
+to and folds in only the labelled rows written since. Naive Bayes counts are additive, so that is exact for new
+labels; a re-categorized row keeps counting its old label too until the next full fit, which
+runs once incremental rows outnumber the ones the model was fitted on.
+
+Prediction is vectorized over the batch: the features of every description go into one array,
+are matched against the model's sorted feature buckets with `searchsorted`, and each row's class
+scores are summed with `add.reduceat`.
+
+    python -m app.ai_agent.categorizer bench [--labels 5000] [--predict 100000] [--min-rate 20000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.finance.models import FinanceChangeCounter, Transaction
+
+HASH_MASK = (1 << 22) - 1
+# Additive smoothing; small because hashed n-gram counts are sparse.
+ALPHA = 0.1
+# Rows scored per step, which bounds the (features x classes) scratch array.
+PREDICT_CHUNK_ROWS = 4_096
+# Incremental updates before the first refit, for models fitted on only a few labels.
+REFIT_MIN_DOCUMENTS = 100
+
+_TOKEN = re.compile(r"[^\W\d_]+|\d+")
+_EMPTY_FEATURES = [zlib.crc32(b"\x00empty") & HASH_MASK]
+
+
+def featurize(description: str) -> list[int]:
+    """Hashed feature buckets of a description, each counted once."""
+
+    words = ["#" if token.isdigit() else token for token in _TOKEN.findall(description.lower())]
+    text = f" {' '.join(words)} "
+    grams = {text[i : i + 3] for i in range(len(text) - 2)}
+    grams.update(f"w:{word}" for word in words)
+    if not grams:
+        return _EMPTY_FEATURES
+    return [zlib.crc32(gram.encode()) & HASH_MASK for gram in grams]
+
+
+def _encode(descriptions: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Features of all descriptions in one array, and where each description's run starts."""
+
+    featurized: dict[str, list[int]] = {}
+    ids: list[int] = []
+    starts: list[int] = []
+    for description in descriptions:
+        features = featurized.get(description)
+        if features is None:
+            features = featurized[description] = featurize(description)
+        starts.append(len(ids))
+        ids.extend(features)
+    return np.array(ids, dtype=np.int64), np.array(starts, dtype=np.int64)
+
+
+class CategoryModel:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        # Sorted feature buckets seen in training, and their per-class occurrence counts.
+        self.buckets = np.empty(0, dtype=np.int64)
+        self.counts = np.empty((0, 0), dtype=np.float32)
+        # Category id of each class column, sorted.
+        self.class_ids = np.empty(0, dtype=np.int64)
+        self.class_documents = np.empty(0, dtype=np.float64)
+        self.documents = 0
+        self.fit_documents = 0
+        self.trained_seq = 0
+        self._log_likelihood: np.ndarray | None = None
+        self._log_prior: np.ndarray | None = None
+
+    def partial_fit(self, descriptions: list[str], category_ids: list[int]) -> None:
+        if not descriptions:
+            return
+        ids, starts = _encode(descriptions)
+        labels = np.asarray(category_ids, dtype=np.int64)
+        class_ids = np.union1d(self.class_ids, labels)
+        buckets = np.union1d(self.buckets, ids)
+
+        counts = np.zeros((len(buckets), len(class_ids)), dtype=np.float32)
+        old_columns = np.searchsorted(class_ids, self.class_ids)
+        if self.counts.size:
+            counts[np.ix_(np.searchsorted(buckets, self.buckets), old_columns)] = self.counts
+        columns = np.searchsorted(class_ids, labels)
+        lengths = np.diff(np.append(starts, len(ids)))
+        cells = np.searchsorted(buckets, ids) * len(class_ids) + np.repeat(columns, lengths)
+        counts += np.bincount(cells, minlength=counts.size).reshape(counts.shape)
+
+        class_documents = np.zeros(len(class_ids))
+        class_documents[old_columns] = self.class_documents
+        class_documents += np.bincount(columns, minlength=len(class_ids))
+
+        self.buckets, self.counts, self.class_ids = buckets, counts, class_ids
+        self.class_documents = class_documents
+        self.documents += len(descriptions)
+        self._log_likelihood = self._log_prior = None
+
+    @property
+    def nbytes(self) -> int:
+        size = self.buckets.nbytes + self.counts.nbytes + self.class_documents.nbytes
+        if self._log_likelihood is not None:
+            size += self._log_likelihood.nbytes
+        return size
+
+    def _parameters(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._log_likelihood is None:
+            smoothed = self.counts + np.float32(ALPHA)
+            self._log_likelihood = np.log(smoothed) - np.log(smoothed.sum(axis=0))
+            self._log_prior = np.log(self.class_documents / self.documents)
+        return self._log_likelihood, self._log_prior
+
+    def predict(self, descriptions: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """The most likely category id for each description, and its probability."""
+
+        if not descriptions or not self.documents:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        log_likelihood, log_prior = self._parameters()
+        best = np.empty(len(descriptions), dtype=np.int64)
+        confidence = np.empty(len(descriptions))
+        for offset in range(0, len(descriptions), PREDICT_CHUNK_ROWS):
+            chunk = slice(offset, offset + PREDICT_CHUNK_ROWS)
+            ids, starts = _encode(descriptions[chunk])
+            positions = np.minimum(np.searchsorted(self.buckets, ids), len(self.buckets) - 1)
+            # Features never seen in training carry no evidence for any class.
+            known = self.buckets[positions] == ids
+            evidence = log_likelihood[positions] * known[:, None]
+            # Every description has at least one feature, so no run in `starts` is empty.
+            scores = np.add.reduceat(evidence, starts, axis=0) + log_prior
+            top = scores.argmax(axis=1)
+            top_scores = scores[np.arange(len(top)), top]
+            best[chunk] = self.class_ids[top]
+            confidence[chunk] = 1.0 / np.exp(scores - top_scores[:, None]).sum(axis=1)
+        return best, confidence
+
+
+class CategorizerCache:
+    """LRU of per-user models; each is brought up to date with the user's labels before use."""
+
+    def __init__(self, max_models: int, max_bytes: int) -> None:
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models: OrderedDict[int, CategoryModel] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fits = 0
+        self.updates = 0
+        self.predictions = 0
+
+    def _model(self, user_id: int) -> CategoryModel:
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is not None:
+                self._models.move_to_end(user_id)
+                self.hits += 1
+                return model
+            self.misses += 1
+            model = self._models[user_id] = CategoryModel()
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+                self.evictions += 1
+            return model
+
+    def _shrink(self) -> None:
+        """Evict least recently used models until the rest fit in `max_bytes`."""
+
+        with self._lock:
+            sizes = {user_id: model.nbytes for user_id, model in self._models.items()}
+            total = sum(sizes.values())
+            # The most recently used model stays even on its own over budget: it is being served.
+            while total > self.max_bytes and len(self._models) > 1:
+                user_id, _ = self._models.popitem(last=False)
+                total -= sizes[user_id]
+                self.evictions += 1
+
+    def _refresh(self, db: Session, user_id: int, model: CategoryModel) -> None:
+        # Writes hold the counter row until they commit, so every row numbered up to the value
+        # read here is already visible.
+        seq = db.execute(
+            select(FinanceChangeCounter.seq).where(FinanceChangeCounter.user_id == user_id)
+        ).scalar() or 0
+        if seq <= model.trained_seq:
+            return
+        refit = not model.documents or (
+            model.documents - model.fit_documents > max(model.fit_documents, REFIT_MIN_DOCUMENTS)
+        )
+        since = 0 if refit else model.trained_seq
+        rows = db.execute(
+            select(Transaction.description, Transaction.category_id)
+            .where(
+                Transaction.user_id == user_id,
+                Transaction.change_seq > since,
+                Transaction.change_seq <= seq,
+                Transaction.category_id.is_not(None),
+            )
+            .order_by(Transaction.change_seq.desc())
+            .limit(settings.categorizer_max_training_rows)
+        ).all()
+        if refit:
+            model.reset()
+        model.partial_fit([row.description for row in rows], [row.category_id for row in rows])
+        if refit:
+            model.fit_documents = model.documents
+        model.trained_seq = seq
+        with self._lock:
+            if refit:
+                self.fits += 1
+            else:
+                self.updates += 1
+
+    def predict(
+        self, db: Session, user_id: int, descriptions: list[str]
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        `(category_ids, confidences)` for `descriptions`, or None while the user has fewer than
+        `CATEGORIZER_MIN_LABELS` categorized transactions to learn from.
+        """
+
+        model = self._model(user_id)
+        with model.lock:
+            self._refresh(db, user_id, model)
+            if model.documents < settings.categorizer_min_labels:
+                return None
+            predicted = model.predict(descriptions)
+        self._shrink()
+        with self._lock:
+            self.predictions += len(descriptions)
+        return predicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": len(self._models),
+                "max_models": self.max_models,
+                "bytes": sum(model.nbytes for model in self._models.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "fits": self.fits,
+                "updates": self.updates,
+                "predictions": self.predictions,
+            }
+
+
+categorizer = CategorizerCache(
+    settings.categorizer_cache_size, settings.categorizer_cache_max_mb * 1024 * 1024
+)
+
+
+BENCH_CATEGORIES = {
+    "food": ["grabfood", "starbucks coffee", "mcdonalds", "kfc delivery", "pizza hut"],
+    "transport": ["grab ride", "uber trip", "shell station", "metro card topup", "parking"],
+    "shopping": ["amazon marketplace", "ikea store", "zara", "apple store", "lazada order"],
+    "bills": ["electricity bill", "water utility", "internet provider", "mobile postpaid"],
+    "income": ["salary payroll", "freelance invoice", "interest credit", "dividend payout"],
+}
+
+
+def _bench_descriptions(rng: random.Random, count: int) -> tuple[list[str], list[int]]:
+    names = list(BENCH_CATEGORIES)
+    descriptions, labels = [], []
+    for _ in range(count):
+        label = rng.randrange(len(names))
+        merchant = rng.choice(BENCH_CATEGORIES[names[label]])
+        descriptions.append(f"{merchant.upper()}*{rng.randrange(10**6)} REF {rng.randrange(10**4)}")
+        labels.append(label)
+    return descriptions, labels
+
+
+def bench(labels: int, predict: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    train, train_labels = _bench_descriptions(rng, labels)
+    test, test_labels = _bench_descriptions(rng, predict)
+    model = CategoryModel()
+    started = time.perf_counter()
+    model.partial_fit(train, train_labels)
+    fit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    predicted, _ = model.predict(test)
+    predict_seconds = time.perf_counter() - started
+    return {
+        "fit_ms": fit_seconds * 1000,
+        "predict_ms": predict_seconds * 1000,
+        "predictions_per_second": predict / predict_seconds,
+        "accuracy": float(np.mean(predicted == np.asarray(test_labels))),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the transaction categorizer.")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--labels", type=int, default=5_000)
+    parser.add_argument("--predict", type=int, default=100_000)
+    parser.add_argument("--min-rate", type=float, default=20_000.0)
+    args = parser.parse_args(argv)
+
+    results = bench(args.labels, args.predict)
+    for name, value in results.items():
+        print(f"{name}: {value:.3f}" if name == "accuracy" else f"{name}: {value:,.0f}")
+    if results["predictions_per_second"] < args.min_rate:
+        print(
+            f"{results['predictions_per_second']:,.0f} predictions/s is below {args.min_rate:,.0f}.",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app.ai_agent import schemas, service
+from app.auth.models import User
+from app.auth.service import get_current_user
+from app.finance.dependencies import get_read_db
+
+router = APIRouter(prefix="/ai", tags=["ai"])
+
+
+@router.get("/category-suggestions", response_model=list[schemas.CategorySuggestion])
+def category_suggestions(
+    limit: int = Query(default=500, ge=1, le=5000),
+    min_confidence: float = Query(default=0.0, ge=0.0, le=1.0),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    content = service.suggest_categories(db, current_user, limit, min_confidence)
+    return Response(content, media_type="application/json")
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class CategorySuggestion(BaseModel):
+    transaction_id: int
+    description: str
+    category_id: int
+    category_name: str
+    # Model probability of the suggested category, 0..1.
+    confidence: float
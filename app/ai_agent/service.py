@@ -1,3 +1,48 @@
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.ai_agent.categorizer import categorizer
+from app.auth.models import User
+from app.finance.cache import category_directory
+from app.finance.models import Transaction
+
+
 def generate_reply(prompt: str) -> dict:
     return {"reply": f"Mock response to '{prompt}'"}
 
+
+def suggest_categories(
+    db: Session, current_user: User, limit: int = 500, min_confidence: float = 0.0
+) -> bytes:
+    """
+    Encoded `CategorySuggestion` list for the user's most recent uncategorized transactions,
+    most confident first. Empty until the user has categorized enough transactions to learn from.
+    """
+
+    rows = db.execute(
+        select(Transaction.id, Transaction.description)
+        .where(Transaction.user_id == current_user.id, Transaction.category_id.is_(None))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(limit)
+    ).all()
+    if not rows:
+        return orjson.dumps([])
+    predicted = categorizer.predict(db, current_user.id, [row.description for row in rows])
+    if predicted is None:
+        return orjson.dumps([])
+    category_ids, confidences = predicted
+    names = category_directory.lookup(db, current_user.id, set(category_ids.tolist()))
+    suggestions = [
+        {
+            "transaction_id": row.id,
+            "description": row.description,
+            "category_id": category_id,
+            "category_name": names[category_id],
+            "confidence": round(confidence, 4),
+        }
+        for row, category_id, confidence in zip(rows, category_ids.tolist(), confidences.tolist())
+        if confidence >= min_confidence and category_id in names
+    ]
+    suggestions.sort(key=lambda suggestion: suggestion["confidence"], reverse=True)
+    return orjson.dumps(suggestions)
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import async_service, schemas
+from app.auth.models import User
+from app.auth.router import read_login_payload
+from app.core.rate_limit import rate_limiter
+from app.database import get_async_db
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+@router.post(
+    "/register",
+    response_model=schemas.RegisterResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def register(
+    payload: schemas.RegisterStartRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Backward-compatible alias for register start.
+    await rate_limiter.acheck(request, "email", payload.email)
+    dev_code = await async_service.start_register(db, payload)
+    return schemas.RegisterResponse(code=dev_code)
+
+
+@router.post(
+    "/register/start",
+    response_model=schemas.RegisterResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def register_start(
+    payload: schemas.RegisterStartRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await rate_limiter.acheck(request, "email", payload.email)
+    dev_code = await async_service.start_register(db, payload)
+    return schemas.RegisterResponse(code=dev_code)
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(request: Request, db: AsyncSession = Depends(get_async_db)):
+    payload = await read_login_payload(request)
+    await rate_limiter.acheck(request, "login", payload.identifier)
+    return await async_service.authenticate_user(db, payload)
+
+
+@router.post("/verify-otp")
+async def verify_otp(
+    payload: schemas.VerifyOtpRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    await rate_limiter.acheck(request, "otp_verify", payload.email)
+    return await async_service.verify_email_otp(db, payload)
+
+
+@router.post("/set-password")
+async def set_password(
+    payload: schemas.SetPasswordRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    await rate_limiter.acheck(request, "password_set")
+    return await async_service.set_password(db, payload)
+
+
+@router.post("/resend-otp")
+async def resend_otp(
+    payload: schemas.ResendOtpRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    await rate_limiter.acheck(request, "email", payload.email)
+    return await async_service.resend_email_otp(db, payload)
+
+
+@router.post("/password/reset/start")
+async def password_reset_start(
+    payload: schemas.PasswordResetStartRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await rate_limiter.acheck(request, "email", payload.email)
+    return await async_service.password_reset_start(db, payload)
+
+
+@router.post("/password/reset/verify", response_model=schemas.PasswordResetVerifyResponse)
+async def password_reset_verify(
+    payload: schemas.PasswordResetVerifyRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await rate_limiter.acheck(request, "otp_verify", payload.email)
+    return await async_service.password_reset_verify(db, payload)
+
+
+@router.post("/password/reset/confirm")
+async def password_reset_confirm(
+    payload: schemas.PasswordResetConfirmRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await rate_limiter.acheck(request, "password_set")
+    return await async_service.password_reset_confirm(db, payload)
+
+
+@router.get("/me", response_model=schemas.UserRead)
+async def me(current_user: User = Depends(async_service.get_current_user)):
+    return current_user
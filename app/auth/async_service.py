@@ -0,0 +1,268 @@
+"""
+Async auth service used when `DB_ASYNC` is enabled.
+
+Queries go through an `AsyncSession`, password hashing runs on the hasher's process pool and
+OTP emails go through the outbox, so nothing here stalls the event loop. Validation and token helpers are shared with
+the sync `service` module.
+"""
+
+from datetime import datetime, timezone
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import outbox, schemas
+from app.auth.cache import principal_cache
+from app.auth.hasher import password_hasher
+from app.auth.models import EmailOTP, User
+from app.auth.security import UNUSABLE_PASSWORD, create_access_token
+from app.auth.service import (
+    _create_action_token,
+    _decode_action_token,
+    _hash_otp,
+    _live_otps_query,
+    _normalize_phone,
+    _split_full_name,
+    _stage_email_otp,
+    _supersede_otps_statement,
+    _validate_password_strength,
+    oauth2_scheme,
+    user_id_from_token,
+)
+from app.core.config import settings
+from app.database import get_async_db
+
+
+async def _first(db: AsyncSession, statement):
+    return (await db.execute(statement)).scalars().first()
+
+
+async def _create_and_send_email_otp(db: AsyncSession, db_user: User) -> str | None:
+    await db.execute(_supersede_otps_statement(db_user.id))
+    code = _stage_email_otp(db, db_user)
+    await db.commit()
+    outbox.email_sender.wake()
+    return code if settings.dev_return_otp else None
+
+
+async def start_register(db: AsyncSession, user: schemas.RegisterStartRequest) -> str | None:
+    full_name = user.full_name.strip()
+    if not full_name:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Full name is required")
+
+    username = user.username.strip()
+    if not username:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username is required")
+
+    phone = _normalize_phone(user.phone)
+
+    existing_username = await _first(db, select(User).where(User.username == username))
+
+    exists = await _first(db, select(User).where(User.email == user.email))
+    if exists:
+        # If not yet verified, allow updating profile + resend OTP.
+        if exists.email_verified:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
+
+        if existing_username and existing_username.id != exists.id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+
+        first_name, last_name = _split_full_name(full_name)
+        exists.first_name = first_name
+        exists.last_name = last_name
+        exists.phone = phone
+        exists.username = username
+        # No password yet; prevent login until set_password marks the account active.
+        exists.hashed_password = UNUSABLE_PASSWORD
+        exists.is_active = False
+        await db.commit()
+        principal_cache.invalidate(exists.id)
+        return await _create_and_send_email_otp(db, exists)
+
+    if existing_username:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
+
+    first_name, last_name = _split_full_name(full_name)
+    db_user = User(
+        email=user.email,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+        phone=phone,
+        hashed_password=UNUSABLE_PASSWORD,
+        email_verified=False,
+        is_active=False,
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+
+    return await _create_and_send_email_otp(db, db_user)
+
+
+async def authenticate_user(db: AsyncSession, user: schemas.UserLogin) -> schemas.Token:
+    identifier = user.identifier.strip()
+    db_user = await _first(
+        db, select(User).where(or_(User.email == identifier, User.username == identifier))
+    )
+    if not db_user or not await password_hasher.averify(user.password, db_user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password",
+        )
+
+    if not db_user.email_verified or not db_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Email is not verified",
+        )
+
+    token = create_access_token(subject=str(db_user.id), email=db_user.email)
+    return schemas.Token(access_token=token)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    user_id = user_id_from_token(token)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    db_user = await db.get(User, user_id)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    principal_cache.put(db_user)
+    return db_user
+
+
+async def get_streaming_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+) -> User:
+    """`get_current_user` with a session closed before the streaming response starts."""
+
+    return await get_current_user(token, db)
+
+
+async def _find_matching_otp(db_user: User, code: str, db: AsyncSession) -> EmailOTP:
+    query = _live_otps_query(db_user.id, settings.otp_max_live_per_user)
+    otps = (await db.execute(query)).scalars().all()
+    if not otps:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP is expired")
+
+    for otp in otps:
+        if _hash_otp(otp.code_salt, code) == otp.code_hash:
+            return otp
+
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP")
+
+
+async def _user_by_email(db: AsyncSession, email: str) -> User:
+    db_user = await _first(db, select(User).where(User.email == email))
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return db_user
+
+
+async def _user_from_action_token(db: AsyncSession, token: str, purpose: str) -> User:
+    decoded = _decode_action_token(token)
+    if not decoded or decoded.get("purpose") != purpose:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    sub = decoded.get("sub")
+    email = decoded.get("email")
+    if not sub or not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    try:
+        user_id = int(sub)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from None
+
+    db_user = await _first(db, select(User).where(User.id == user_id, User.email == email))
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if not db_user.email_verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email is not verified")
+    return db_user
+
+
+async def verify_email_otp(
+    db: AsyncSession, payload: schemas.VerifyOtpRequest
+) -> schemas.VerifyOtpResponse:
+    db_user = await _user_by_email(db, payload.email)
+
+    matched = await _find_matching_otp(db_user, payload.code, db)
+    matched.consumed_at = datetime.now(timezone.utc)
+    db_user.email_verified = True
+    db_user.is_active = False
+    await db.commit()
+    principal_cache.invalidate(db_user.id)
+    return schemas.VerifyOtpResponse(
+        registration_token=_create_action_token(
+            user_id=db_user.id, email=db_user.email, purpose="set_password"
+        )
+    )
+
+
+async def set_password(db: AsyncSession, payload: schemas.SetPasswordRequest) -> dict:
+    db_user = await _user_from_action_token(db, payload.registration_token, "set_password")
+
+    _validate_password_strength(payload.password)
+    db_user.hashed_password = await password_hasher.ahash(payload.password)
+    db_user.is_active = True
+    await db.commit()
+    principal_cache.invalidate(db_user.id)
+    return {"message": "Password set"}
+
+
+async def resend_email_otp(db: AsyncSession, payload: schemas.ResendOtpRequest) -> dict:
+    db_user = await _user_by_email(db, payload.email)
+    if db_user.email_verified and db_user.is_active:
+        return {"message": "Already verified"}
+
+    await _create_and_send_email_otp(db, db_user)
+    return {"message": "OTP sent to email"}
+
+
+async def password_reset_start(db: AsyncSession, payload: schemas.PasswordResetStartRequest) -> dict:
+    db_user = await _user_by_email(db, payload.email)
+    if not db_user.email_verified or not db_user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not active")
+
+    await _create_and_send_email_otp(db, db_user)
+    return {"message": "OTP sent to email"}
+
+
+async def password_reset_verify(
+    db: AsyncSession, payload: schemas.PasswordResetVerifyRequest
+) -> schemas.PasswordResetVerifyResponse:
+    db_user = await _user_by_email(db, payload.email)
+    if not db_user.email_verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email is not verified")
+
+    matched = await _find_matching_otp(db_user, payload.code, db)
+    matched.consumed_at = datetime.now(timezone.utc)
+    await db.commit()
+
+    return schemas.PasswordResetVerifyResponse(
+        reset_token=_create_action_token(
+            user_id=db_user.id, email=db_user.email, purpose="reset_password"
+        )
+    )
+
+
+async def password_reset_confirm(
+    db: AsyncSession, payload: schemas.PasswordResetConfirmRequest
+) -> dict:
+    db_user = await _user_from_action_token(db, payload.reset_token, "reset_password")
+
+    _validate_password_strength(payload.password)
+    db_user.hashed_password = await password_hasher.ahash(payload.password)
+    db_user.is_active = True
+    await db.commit()
+    principal_cache.invalidate(db_user.id)
+    return {"message": "Password reset"}
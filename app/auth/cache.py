@@ -0,0 +1,156 @@
+"""
+Caches for resolving the authenticated principal without a `users` query per request.
+
+`TokenCache` remembers bearer tokens whose signature has already been verified, until they
+expire. `PrincipalCache` keeps the user's profile columns for `PRINCIPAL_CACHE_TTL_SECONDS`; a
+user deleted from the database is therefore rejected at most that long after the deletion.
+Account writes in the auth service drop the user's entry right away.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from app.auth.models import User
+from app.core.config import settings
+from app.core.redis import get_redis
+
+PRINCIPAL_COLUMNS = (
+    "id",
+    "email",
+    "username",
+    "first_name",
+    "last_name",
+    "phone",
+    "email_verified",
+    "is_active",
+)
+
+
+class TokenCache:
+    """Per-process LRU of verified token payloads; verification is a local computation anyway."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_verify(self, token: str, verify: Callable[[str], dict | None]) -> dict | None:
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None and payload.get("exp", 0) > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return payload
+            self._entries.pop(token, None)
+            self.misses += 1
+
+        payload = verify(token)
+        if payload is None:
+            return None
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class MemoryPrincipalBackend:
+    """LRU of principals, each kept for `ttl_seconds`."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return data
+
+    def set(self, user_id: int, data: dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+class RedisPrincipalBackend:
+    """Shared across workers, so an invalidation is seen by all of them at once."""
+
+    def __init__(self, client, ttl_seconds: float, prefix: str = "auth:principal") -> None:
+        self.client = client
+        self.ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.prefix = prefix
+
+    def get(self, user_id: int) -> dict | None:
+        raw = self.client.get(f"{self.prefix}:{user_id}")
+        return None if raw is None else json.loads(raw)
+
+    def set(self, user_id: int, data: dict) -> None:
+        self.client.set(f"{self.prefix}:{user_id}", json.dumps(data), px=self.ttl_ms)
+
+    def delete(self, user_id: int) -> None:
+        self.client.delete(f"{self.prefix}:{user_id}")
+
+
+class PrincipalCache:
+    def __init__(self, backend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> User | None:
+        """A detached `User` with the profile columns (no password hash), or None on a miss."""
+
+        data = self.backend.get(user_id)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return User(**data)
+
+    def put(self, db_user: User) -> None:
+        self.backend.set(
+            db_user.id, {column: getattr(db_user, column) for column in PRINCIPAL_COLUMNS}
+        )
+
+    def invalidate(self, user_id: int) -> None:
+        self.backend.delete(user_id)
+
+    def stats(self) -> dict:
+        return {"backend": type(self.backend).__name__, "hits": self.hits, "misses": self.misses}
+
+
+def build_backend():
+    ttl = settings.principal_cache_ttl_seconds
+    if settings.principal_cache_backend == "memory":
+        return MemoryPrincipalBackend(settings.principal_cache_max_entries, ttl)
+    if settings.principal_cache_backend == "redis":
+        return RedisPrincipalBackend(get_redis(), ttl)
+    raise RuntimeError(f"Unknown PRINCIPAL_CACHE_BACKEND: {settings.principal_cache_backend!r}")
+
+
+token_cache = TokenCache(settings.token_cache_max_entries)
+principal_cache = PrincipalCache(build_backend())
@@ -1,30 +1,108 @@
+import queue
 import smtplib
+import threading
 from email.message import EmailMessage
 
 from app.core.config import settings
 
+# Per socket operation (connect, each command), not per message.
+SMTP_TIMEOUT_SECONDS = 30
 
-def send_otp_email(*, to_email: str, code: str) -> None:
-    if not settings.smtp_user or not settings.smtp_password:
-        raise RuntimeError("SMTP is not configured. Set SMTP_USER and SMTP_PASSWORD in .env.")
 
+def smtp_configured() -> bool:
+    # A plain (non-SSL) server is a local relay or test stand-in and may not need a login.
+    return bool(settings.smtp_user and settings.smtp_password) or not settings.smtp_ssl
+
+
+def otp_email_content(code: str) -> tuple[str, str]:
+    """Subject and body of the OTP email."""
+
+    body = "\n".join(
+        [
+            "Your OTP code:",
+            code,
+            "",
+            f"This code expires in {settings.otp_expire_minutes} minutes.",
+            "If you did not request this, you can ignore this email.",
+        ]
+    )
+    return "Your Finance AI OTP code", body
+
+
+def build_message(*, to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
-    msg["Subject"] = "Your Finance AI OTP code"
-    msg["From"] = settings.smtp_from or settings.smtp_user
+    msg["Subject"] = subject
+    msg["From"] = settings.smtp_from or settings.smtp_user or "no-reply@localhost"
     msg["To"] = to_email
-    msg.set_content(
-        "\n".join(
-            [
-                "Your OTP code:",
-                code,
-                "",
-                f"This code expires in {settings.otp_expire_minutes} minutes.",
-                "If you did not request this, you can ignore this email.",
-            ]
-        )
-    )
+    msg.set_content(body)
+    return msg
+
 
-    with smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port) as server:
+def open_smtp_connection() -> smtplib.SMTP:
+    if settings.smtp_ssl:
+        server = smtplib.SMTP_SSL(
+            settings.smtp_host, settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS
+        )
+    else:
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+    if settings.smtp_user and settings.smtp_password:
         server.login(settings.smtp_user, settings.smtp_password)
-        server.send_message(msg)
+    return server
+
+
+class SmtpConnectionPool:
+    """
+    Up to `size` logged-in SMTP connections, reused across messages.
+
+    Skips the TCP + TLS handshake and AUTH for every message after the first on each connection.
+    A connection the server has dropped is replaced once before the send is reported as failed.
+    """
+
+    def __init__(self, size: int, connect=open_smtp_connection) -> None:
+        self.size = size
+        self.connect = connect
+        self._idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _open(self) -> smtplib.SMTP:
+        server = self.connect()
+        self.connections_opened += 1
+        return server
+
+    def send(self, msg: EmailMessage) -> None:
+        with self._slots:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._open()
+            try:
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    _close_quietly(server)
+                    server = self._open()
+                    server.send_message(msg)
+            except smtplib.SMTPRecipientsRefused:
+                # The connection is still usable; only this message failed.
+                self._idle.put(server)
+                raise
+            except BaseException:
+                _close_quietly(server)
+                raise
+            self._idle.put(server)
+
+    def close(self) -> None:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close_quietly(server)
+
 
+def _close_quietly(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
@@ -0,0 +1,177 @@
+"""
+Password hashing on a bounded process pool.
+
+PBKDF2 holds the GIL for its whole run, so hashing on request threads or the event loop stalls
+every other request in the worker. `PasswordHasher` runs it in separate processes and admits at
+most `PASSWORD_HASH_MAX_PENDING` jobs per API worker; beyond that it fails fast with a 503 so a
+login burst sheds load instead of queueing requests until they time out.
+If a pool process dies, the broken pool is replaced and the jobs it failed are retried once.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from app.auth import security
+from app.core.config import settings
+
+RATE_WINDOW_SECONDS = 60.0
+
+
+def _timed(fn_name: str, args: tuple, enqueued_at: float):
+    """Runs in a pool process; also reports how long the job waited for a free process."""
+
+    started_at = time.time()
+    return getattr(security, fn_name)(*args), started_at - enqueued_at
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed_at: deque[float] = deque()
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use, and with "spawn", so pool processes don't inherit the server's
+        # threads and sockets.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        # A pool process died (e.g. the OOM killer); the executor refuses all work from then on.
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        executor.shutdown(wait=False)
+
+    def _submit(self, fn_name: str, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        result: Future = Future()
+        try:
+            self._start(result, fn_name, args, retry=True)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return result
+
+    def _start(self, result: Future, fn_name: str, args: tuple, retry: bool) -> None:
+        """Runs the job; one hit by a broken pool is retried once on a fresh pool."""
+
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            job = executor.submit(_timed, fn_name, args, time.time())
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            if not retry:
+                raise
+            self._start(result, fn_name, args, retry=False)
+            return
+
+        def done(job: Future) -> None:
+            now = time.monotonic()
+            if job.cancelled():
+                with self._lock:
+                    self._pending -= 1
+                result.cancel()
+                return
+            error = job.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._discard_executor(executor)
+                if retry:
+                    try:
+                        self._start(result, fn_name, args, retry=False)
+                        return
+                    except BaseException as retry_error:
+                        error = retry_error
+            with self._lock:
+                self._pending -= 1
+                if error is None:
+                    waited = job.result()[1]
+                    self.completed += 1
+                    self.wait_seconds_total += waited
+                    self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                    self._completed_at.append(now)
+                    while self._completed_at and self._completed_at[0] < now - RATE_WINDOW_SECONDS:
+                        self._completed_at.popleft()
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(job.result()[0])
+
+        job.add_done_callback(done)
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash_password", password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if security.is_unusable_password(hashed_password):
+            return False
+        return self._submit("verify_password", plain_password, hashed_password).result()
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash_password", password))
+
+    async def averify(self, plain_password: str, hashed_password: str) -> bool:
+        if security.is_unusable_password(hashed_password):
+            return False
+        return await asyncio.wrap_future(
+            self._submit("verify_password", plain_password, hashed_password)
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            recent = sum(1 for t in self._completed_at if t >= now - RATE_WINDOW_SECONDS)
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "hashes_per_second": recent / RATE_WINDOW_SECONDS,
+                "queue_wait_seconds_avg": (
+                    self.wait_seconds_total / self.completed if self.completed else 0.0
+                ),
+                "queue_wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers or os.cpu_count() or 1,
+    max_pending=settings.password_hash_max_pending,
+)
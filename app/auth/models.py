@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, func
 
 from app.database import Base
 
@@ -28,4 +28,35 @@ class EmailOTP(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     consumed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-
+
+    # Verification only looks at a user's live codes, newest first; the purge job looks at
+    # consumed ones. Partial indexes keep each to the rows it needs.
+    __table_args__ = (
+        Index(
+            "ix_email_otps_user_live",
+            user_id,
+            expires_at.desc(),
+            postgresql_where=consumed_at.is_(None),
+        ),
+        Index("ix_email_otps_consumed", consumed_at, postgresql_where=consumed_at.is_not(None)),
+    )
+
+
+class EmailOutbox(Base):
+    """Outbound emails, written in the same transaction as the state they announce."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    # Cleared once the message is sent or given up on, so OTP codes don't linger in the table.
+    body = Column(Text, nullable=False)
+    # pending -> sending -> sent | failed; "sending" rows past `next_attempt_at` are reclaimed.
+    status = Column(String, nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt", status, next_attempt_at),)
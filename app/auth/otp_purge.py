@@ -0,0 +1,110 @@
+"""
+Purge of expired and consumed email OTPs.
+
+Deletes in short transactions of `OTP_PURGE_BATCH_SIZE` rows, each picked with `SKIP LOCKED`, so
+the purge never holds locks long enough to stall a verification and several workers can run it
+at once without blocking each other.
+
+    python -m app.auth.otp_purge [--batch-size N]
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+
+from app.auth.models import EmailOTP
+from app.core.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def purge_batch(db: Session, batch_size: int) -> int:
+    """Delete up to `batch_size` dead OTPs and commit. Returns the number deleted."""
+
+    # Leave recently dead rows for a while so support can still see what happened.
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.otp_purge_grace_seconds)
+    dead = (
+        select(EmailOTP.id)
+        .where(or_(EmailOTP.expires_at < cutoff, EmailOTP.consumed_at < cutoff))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    ids = db.execute(dead).scalars().all()
+    if ids:
+        db.execute(delete(EmailOTP).where(EmailOTP.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def purge(db: Session, batch_size: int | None = None, pause_seconds: float = 0.0) -> int:
+    """Purge batches until none are left. Returns the total number of rows deleted."""
+
+    batch_size = batch_size or settings.otp_purge_batch_size
+    total = 0
+    while True:
+        deleted = purge_batch(db, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        if pause_seconds:
+            # Gives replication and concurrent writers room between batches.
+            time.sleep(pause_seconds)
+
+
+class OtpPurger:
+    """Runs `purge()` every `OTP_PURGE_INTERVAL_SECONDS` on a daemon thread."""
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self.session_factory = session_factory
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.runs = 0
+        self.deleted = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="otp-purge", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(settings.otp_purge_interval_seconds):
+            try:
+                with self.session_factory() as db:
+                    self.deleted += purge(db, pause_seconds=0.05)
+                self.runs += 1
+            except Exception:
+                logger.exception("OTP purge failed; retrying at the next interval")
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "deleted": self.deleted}
+
+
+otp_purger = OtpPurger()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Delete expired and consumed email OTPs.")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        deleted = purge(db, args.batch_size, pause_seconds=0.05)
+    print(f"Deleted {deleted} OTP row(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
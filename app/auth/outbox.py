@@ -0,0 +1,342 @@
+"""
+Durable outbound email queue.
+
+Request handlers only `enqueue()` a row in `email_outbox`, in the same transaction as the OTP it
+carries. `OutboxSender` claims due rows in batches (`FOR UPDATE SKIP LOCKED`, so several workers
+can run senders side by side), delivers them over a small pool of logged-in SMTP connections and
+retries failures with exponential backoff until `EMAIL_OUTBOX_MAX_ATTEMPTS`.
+
+A claim is a lease: a sender that dies mid-batch leaves its rows to be claimed again once the
+lease ends. Batches are capped so that even a batch that times out message by message on every
+pooled connection finishes within the lease; otherwise its rows would be sent twice.
+
+The benchmark runs in a throwaway copy of the table (its own Postgres schema, or a temporary
+SQLite file), so it can neither deliver real users' emails to the stand-in nor have running API
+senders deliver its messages to the real SMTP server.
+
+    python -m app.auth.outbox run
+    python -m app.auth.outbox bench [--count 1000]
+"""
+
+import argparse
+import logging
+import os
+import secrets
+import smtplib
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth.email import SMTP_TIMEOUT_SECONDS, SmtpConnectionPool, build_message
+from app.auth.models import EmailOutbox
+from app.core.config import settings
+from app.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed row stays invisible to other senders before it is considered abandoned.
+CLAIM_LEASE_SECONDS = 300
+# A send may reconnect once: connect + send, twice.
+WORST_CASE_SEND_SECONDS = 4 * SMTP_TIMEOUT_SECONDS
+MAX_RETRY_DELAY_SECONDS = 3600
+LATENCY_SAMPLES = 1000
+
+
+def enqueue(db: Session, *, to_email: str, subject: str, body: str) -> None:
+    """Add a message to the outbox. Does not commit; the caller's transaction makes it durable."""
+
+    db.add(EmailOutbox(to_email=to_email, subject=subject, body=body, status="pending"))
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(settings.email_outbox_retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+
+class OutboxSender:
+    def __init__(self, session_factory=SessionLocal, pool: SmtpConnectionPool | None = None) -> None:
+        self.session_factory = session_factory
+        self.pool = pool or SmtpConnectionPool(settings.smtp_pool_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool.size, thread_name_prefix="email-outbox"
+        )
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    def wake(self) -> None:
+        """Deliver new rows now instead of at the next poll."""
+
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self.drain_once()
+            except Exception:
+                # Keep the sender alive across DB hiccups; the rows are retried after their lease.
+                logger.exception("Email outbox sender failed to drain a batch")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(settings.email_outbox_poll_seconds)
+                self._wake.clear()
+
+    def claim_limit(self) -> int:
+        """Rows per claim: at most as many as the pool can get through, slowly, within the lease."""
+
+        rounds = max(CLAIM_LEASE_SECONDS // WORST_CASE_SEND_SECONDS, 1)
+        return max(min(settings.email_outbox_batch_size, rounds * self.pool.size), 1)
+
+    def _claim(self, db: Session) -> list:
+        now = datetime.now(timezone.utc)
+        rows = db.execute(
+            select(
+                EmailOutbox.id,
+                EmailOutbox.to_email,
+                EmailOutbox.subject,
+                EmailOutbox.body,
+                EmailOutbox.attempts,
+                EmailOutbox.created_at,
+            )
+            .where(
+                EmailOutbox.status.in_(("pending", "sending")),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.claim_limit())
+            .with_for_update(skip_locked=True)
+        ).all()
+        if rows:
+            db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([row.id for row in rows]))
+                .values(status="sending", next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+            )
+        db.commit()
+        return rows
+
+    def _deliver(self, row) -> str | None:
+        try:
+            self.pool.send(build_message(to_email=row.to_email, subject=row.subject, body=row.body))
+        except smtplib.SMTPRecipientsRefused as exc:
+            return f"permanent: {exc}"
+        except (smtplib.SMTPException, OSError) as exc:
+            return str(exc) or type(exc).__name__
+        return None
+
+    def drain_once(self) -> int:
+        """Claim and deliver one batch; returns the number of rows claimed."""
+
+        with self.session_factory() as db:
+            rows = self._claim(db)
+            if not rows:
+                return 0
+            errors = list(self._executor.map(self._deliver, rows))
+
+            now = datetime.now(timezone.utc)
+            sent, retried, failed = [], [], []
+            for row, error in zip(rows, errors):
+                attempts = row.attempts + 1
+                result = {"id": row.id, "attempts": attempts, "last_error": error and error[:500]}
+                if error is None:
+                    sent.append({**result, "status": "sent", "sent_at": now, "body": ""})
+                    self._record_latency(now, row.created_at)
+                elif error.startswith("permanent:") or attempts >= settings.email_outbox_max_attempts:
+                    failed.append({**result, "status": "failed", "body": ""})
+                else:
+                    retry_at = now + timedelta(seconds=_retry_delay(attempts))
+                    retried.append({**result, "status": "pending", "next_attempt_at": retry_at})
+            # Bulk UPDATE by primary key; rows with the same keys are batched into one statement.
+            db.execute(update(EmailOutbox), sent + retried + failed)
+            db.commit()
+
+        with self._lock:
+            self.sent += len(sent)
+            self.retried += len(retried)
+            self.failed += len(failed)
+        return len(rows)
+
+    def _record_latency(self, now: datetime, created_at: datetime | None) -> None:
+        if created_at is None:
+            return
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        with self._lock:
+            self._latencies.append((now - created_at).total_seconds())
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            sent, retried, failed = self.sent, self.retried, self.failed
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            "sent": sent,
+            "retried": retried,
+            "failed": failed,
+            "smtp_connections_opened": self.pool.connections_opened,
+            "delivery_seconds_p50": percentile(0.50),
+            "delivery_seconds_p95": percentile(0.95),
+            "delivery_seconds_p99": percentile(0.99),
+        }
+
+
+email_sender = OutboxSender()
+
+
+class _StandInSmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages: for local tests and the benchmark, not for mail."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self) -> None:
+        self._reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-stand-in\r\n250 8BITMIME\r\n")
+            elif command.startswith("DATA"):
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.received += 1
+                self._reply("250 OK")
+            elif command.startswith("QUIT"):
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+class StandInSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)) -> None:
+        super().__init__(address, _StandInSmtpHandler)
+        self.received = 0
+
+
+def _isolated_outbox():
+    """An engine whose `email_outbox` is a private, empty copy, and a function that drops it."""
+
+    if engine.dialect.name == "postgresql":
+        schema = f"outbox_bench_{secrets.token_hex(4)}"
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        bench_engine = engine.execution_options(schema_translate_map={None: schema})
+
+        def drop() -> None:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+    else:
+        fd, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        bench_engine = create_engine(f"sqlite:///{path}")
+
+        def drop() -> None:
+            bench_engine.dispose()
+            os.remove(path)
+
+    EmailOutbox.__table__.create(bind=bench_engine)
+    return bench_engine, drop
+
+
+def bench(count: int) -> dict:
+    """Enqueue `count` OTP-sized emails at once and time their delivery to a local stand-in."""
+
+    server = StandInSmtpServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    bench_engine, drop_outbox = _isolated_outbox()
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+    sender = OutboxSender(
+        session_factory=session_factory,
+        pool=SmtpConnectionPool(settings.smtp_pool_size, connect=lambda: smtplib.SMTP(host, port)),
+    )
+    try:
+        started = time.perf_counter()
+        with session_factory() as db:
+            for index in range(count):
+                enqueue(
+                    db,
+                    to_email=f"bench-{index}@example.invalid",
+                    subject="Your Finance AI OTP code",
+                    body=f"Your OTP code:\n{index:06d}\n",
+                )
+            db.commit()
+        enqueued = time.perf_counter()
+        while sender.sent + sender.failed < count and sender.drain_once():
+            pass
+        finished = time.perf_counter()
+        stats = sender.stats()
+        return {
+            "emails": count,
+            "received": server.received,
+            "enqueue_seconds": enqueued - started,
+            "deliver_seconds": finished - enqueued,
+            "emails_per_second": count / (finished - enqueued) if finished > enqueued else 0.0,
+            **stats,
+        }
+    finally:
+        sender.stop()
+        server.shutdown()
+        drop_outbox()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the email outbox sender or benchmark it.")
+    parser.add_argument("command", choices=["run", "bench"])
+    parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        for key, value in bench(args.count).items():
+            print(f"{key}: {value}")
+        return 0
+
+    email_sender.start()
+    try:
+        while True:
+            time.sleep(60)
+            print(email_sender.stats(), file=sys.stderr)
+    except KeyboardInterrupt:
+        email_sender.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
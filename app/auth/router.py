@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.auth import schemas, service
 from app.auth.models import User
+from app.core.rate_limit import rate_limiter
 from app.database import get_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -13,8 +15,11 @@ router = APIRouter(prefix="/auth", tags=["auth"])
     response_model=schemas.RegisterResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def register(payload: schemas.RegisterStartRequest, db: Session = Depends(get_db)):
+def register(
+    payload: schemas.RegisterStartRequest, request: Request, db: Session = Depends(get_db)
+):
     # Backward-compatible alias for register start.
+    rate_limiter.check(request, "email", payload.email)
     dev_code = service.start_register(db, payload)
     return schemas.RegisterResponse(code=dev_code)
 
@@ -24,13 +29,15 @@ def register(payload: schemas.RegisterStartRequest, db: Session = Depends(get_db
     response_model=schemas.RegisterResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def register_start(payload: schemas.RegisterStartRequest, db: Session = Depends(get_db)):
+def register_start(
+    payload: schemas.RegisterStartRequest, request: Request, db: Session = Depends(get_db)
+):
+    rate_limiter.check(request, "email", payload.email)
     dev_code = service.start_register(db, payload)
     return schemas.RegisterResponse(code=dev_code)
 
 
-@router.post("/login", response_model=schemas.Token)
-async def login(request: Request, db: Session = Depends(get_db)):
+async def read_login_payload(request: Request) -> schemas.UserLogin:
     content_type = request.headers.get("content-type", "")
 
     # Swagger UI "Authorize" uses OAuth2 password flow and sends form fields:
@@ -41,49 +48,63 @@ async def login(request: Request, db: Session = Depends(get_db)):
         form = await request.form()
         identifier = form.get("username")
         password = form.get("password")
-        payload = schemas.UserLogin(identifier=identifier, password=password)
-        return service.authenticate_user(db, payload)
+        return schemas.UserLogin(identifier=identifier, password=password)
 
     # Support JSON login for React clients.
     data = await request.json()
     identifier = data.get("identifier") or data.get("email") or data.get("username")
-    payload = schemas.UserLogin(identifier=identifier, password=data.get("password"))
-    return service.authenticate_user(db, payload)
+    return schemas.UserLogin(identifier=identifier, password=data.get("password"))
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(request: Request, db: Session = Depends(get_db)):
+    payload = await read_login_payload(request)
+    await rate_limiter.acheck(request, "login", payload.identifier)
+    # Blocking DB access and password hashing must stay off the event loop.
+    return await run_in_threadpool(service.authenticate_user, db, payload)
 
 
 @router.post("/verify-otp")
-def verify_otp(payload: schemas.VerifyOtpRequest, db: Session = Depends(get_db)):
+def verify_otp(payload: schemas.VerifyOtpRequest, request: Request, db: Session = Depends(get_db)):
+    rate_limiter.check(request, "otp_verify", payload.email)
     return service.verify_email_otp(db, payload)
 
 
 @router.post("/set-password")
-def set_password(payload: schemas.SetPasswordRequest, db: Session = Depends(get_db)):
+def set_password(
+    payload: schemas.SetPasswordRequest, request: Request, db: Session = Depends(get_db)
+):
+    rate_limiter.check(request, "password_set")
     return service.set_password(db, payload)
 
 
 @router.post("/resend-otp")
-def resend_otp(payload: schemas.ResendOtpRequest, db: Session = Depends(get_db)):
+def resend_otp(payload: schemas.ResendOtpRequest, request: Request, db: Session = Depends(get_db)):
+    rate_limiter.check(request, "email", payload.email)
     return service.resend_email_otp(db, payload)
 
 
 @router.post("/password/reset/start")
 def password_reset_start(
-    payload: schemas.PasswordResetStartRequest, db: Session = Depends(get_db)
+    payload: schemas.PasswordResetStartRequest, request: Request, db: Session = Depends(get_db)
 ):
+    rate_limiter.check(request, "email", payload.email)
     return service.password_reset_start(db, payload)
 
 
 @router.post("/password/reset/verify", response_model=schemas.PasswordResetVerifyResponse)
 def password_reset_verify(
-    payload: schemas.PasswordResetVerifyRequest, db: Session = Depends(get_db)
+    payload: schemas.PasswordResetVerifyRequest, request: Request, db: Session = Depends(get_db)
 ):
+    rate_limiter.check(request, "otp_verify", payload.email)
     return service.password_reset_verify(db, payload)
 
 
 @router.post("/password/reset/confirm")
 def password_reset_confirm(
-    payload: schemas.PasswordResetConfirmRequest, db: Session = Depends(get_db)
+    payload: schemas.PasswordResetConfirmRequest, request: Request, db: Session = Depends(get_db)
 ):
+    rate_limiter.check(request, "password_set")
     return service.password_reset_confirm(db, payload)
 
 
@@ -7,12 +7,22 @@ from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+# Stored for accounts that have no password yet. Not a valid hash, so nothing can match it, and
+# setting it costs no hashing.
+UNUSABLE_PASSWORD = "!"
+
+
+def is_unusable_password(hashed_password: str) -> bool:
+    return hashed_password.startswith(UNUSABLE_PASSWORD)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if is_unusable_password(hashed_password):
+        return False
     return pwd_context.verify(plain_password, hashed_password)
 
 
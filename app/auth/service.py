@@ -5,12 +5,15 @@ import secrets
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update
 
 from app.auth import schemas
-from app.auth.email import send_otp_email
+from app.auth.cache import principal_cache, token_cache
+from app.auth import outbox
+from app.auth.email import otp_email_content, smtp_configured
+from app.auth.hasher import password_hasher
 from app.auth.models import EmailOTP, User
-from app.auth.security import create_access_token, decode_token, hash_password, verify_password
+from app.auth.security import UNUSABLE_PASSWORD, create_access_token, decode_token
 from app.database import get_db
 from app.core.config import settings
 from jose import jwt
@@ -47,7 +50,7 @@ def _validate_password_strength(password: str) -> None:
             detail="Password must include a number or special character",
         )
 
-def _create_and_send_email_otp(db: Session, db_user: User) -> str | None:
+def _new_email_otp(db_user: User) -> tuple[EmailOTP, str]:
     code = f"{secrets.randbelow(1_000_000):06d}"
     salt = secrets.token_hex(16)
 
@@ -59,17 +62,63 @@ def _create_and_send_email_otp(db: Session, db_user: User) -> str | None:
         expires_at=expires_at,
         consumed_at=None,
     )
+    return otp, code
+
+
+def _stage_email_otp(db: Session, db_user: User) -> str:
+    """Add a new OTP and the outbox email carrying it to the session; the caller commits."""
+
+    # Allow local testing without SMTP configured.
+    if not smtp_configured() and not settings.dev_return_otp:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SMTP is not configured. Set SMTP_USER and SMTP_PASSWORD in .env.",
+        )
+    otp, code = _new_email_otp(db_user)
     db.add(otp)
-    db.commit()
+    if smtp_configured():
+        subject, body = otp_email_content(code)
+        outbox.enqueue(db, to_email=db_user.email, subject=subject, body=body)
+    return code
 
-    try:
-        send_otp_email(to_email=db_user.email, code=code)
-    except RuntimeError as exc:
-        # Allow local testing without SMTP configured.
-        if settings.dev_return_otp:
-            return code
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
 
+def _live_otps_query(user_id: int, limit: int):
+    now = datetime.now(timezone.utc)
+    return (
+        select(EmailOTP)
+        .where(
+            EmailOTP.user_id == user_id,
+            EmailOTP.consumed_at.is_(None),
+            EmailOTP.expires_at > now,
+        )
+        .order_by(EmailOTP.expires_at.desc(), EmailOTP.id.desc())
+        .limit(limit)
+    )
+
+
+def _supersede_otps_statement(user_id: int):
+    """Consume all but the newest `otp_max_live_per_user - 1` live codes to make room for one more."""
+
+    keep = _live_otps_query(user_id, settings.otp_max_live_per_user - 1).with_only_columns(EmailOTP.id)
+    return (
+        update(EmailOTP)
+        .where(
+            EmailOTP.user_id == user_id,
+            EmailOTP.consumed_at.is_(None),
+            EmailOTP.id.not_in(keep),
+        )
+        .values(consumed_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _create_and_send_email_otp(db: Session, db_user: User) -> str | None:
+    # Resends replace older codes, so a user's live codes (and verify cost) stay bounded.
+    db.execute(_supersede_otps_statement(db_user.id))
+    code = _stage_email_otp(db, db_user)
+    db.commit()
+    # Delivery happens in the background sender; the request doesn't wait for SMTP.
+    outbox.email_sender.wake()
     return code if settings.dev_return_otp else None
 
 
@@ -103,9 +152,10 @@ def start_register(db: Session, user: schemas.RegisterStartRequest) -> str | Non
         exists.phone = phone
         exists.username = username
         # No password yet; prevent login until set_password marks the account active.
-        exists.hashed_password = hash_password(secrets.token_urlsafe(24))
+        exists.hashed_password = UNUSABLE_PASSWORD
         exists.is_active = False
         db.commit()
+        principal_cache.invalidate(exists.id)
         return _create_and_send_email_otp(db, exists)
 
     if existing_username:
@@ -118,7 +168,7 @@ def start_register(db: Session, user: schemas.RegisterStartRequest) -> str | Non
         first_name=first_name,
         last_name=last_name,
         phone=phone,
-        hashed_password=hash_password(secrets.token_urlsafe(24)),
+        hashed_password=UNUSABLE_PASSWORD,
         email_verified=False,
         is_active=False,
     )
@@ -134,7 +184,7 @@ def authenticate_user(db: Session, user: schemas.UserLogin) -> schemas.Token:
     db_user = db.query(User).filter(
         or_(User.email == identifier, User.username == identifier)
     ).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not password_hasher.verify(user.password, db_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -150,11 +200,8 @@ def authenticate_user(db: Session, user: schemas.UserLogin) -> schemas.Token:
     return schemas.Token(access_token=token)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    payload = decode_token(token)
+def user_id_from_token(token: str) -> int:
+    payload = token_cache.get_or_verify(token, decode_token)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -169,19 +216,42 @@ def get_current_user(
         )
 
     try:
-        user_id = int(subject)
+        return int(subject)
     except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token",
         ) from None
 
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return db_user
-
-
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    user_id = user_id_from_token(token)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    principal_cache.put(db_user)
+    return db_user
+
+
+def get_streaming_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db, scope="function"),
+) -> User:
+    """
+    `get_current_user` for streaming responses. A request-scoped session is only closed once the
+    response ends, so an open stream would keep its pooled connection checked out.
+    """
+
+    return get_current_user(token, db)
+
+
 def _create_action_token(*, user_id: int, email: str, purpose: str, minutes: int = 15) -> str:
     exp = datetime.now(timezone.utc) + timedelta(minutes=minutes)
     to_encode = {
@@ -200,17 +270,7 @@ def _decode_action_token(token: str) -> dict:
         return {}
 
 def _find_matching_otp(db_user: User, code: str, db: Session) -> EmailOTP:
-    now = datetime.now(timezone.utc)
-    otps = (
-        db.query(EmailOTP)
-        .filter(
-            EmailOTP.user_id == db_user.id,
-            EmailOTP.consumed_at.is_(None),
-            EmailOTP.expires_at > now,
-        )
-        .order_by(EmailOTP.created_at.desc(), EmailOTP.id.desc())
-        .all()
-    )
+    otps = db.execute(_live_otps_query(db_user.id, settings.otp_max_live_per_user)).scalars().all()
     if not otps:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP is expired")
 
@@ -231,6 +291,7 @@ def verify_email_otp(db: Session, payload: schemas.VerifyOtpRequest) -> schemas.
     db_user.email_verified = True
     db_user.is_active = False
     db.commit()
+    principal_cache.invalidate(db_user.id)
     return schemas.VerifyOtpResponse(
         registration_token=_create_action_token(
             user_id=db_user.id, email=db_user.email, purpose="set_password"
@@ -260,9 +321,10 @@ def set_password(db: Session, payload: schemas.SetPasswordRequest) -> dict:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email is not verified")
 
     _validate_password_strength(payload.password)
-    db_user.hashed_password = hash_password(payload.password)
+    db_user.hashed_password = password_hasher.hash(payload.password)
     db_user.is_active = True
     db.commit()
+    principal_cache.invalidate(db_user.id)
     return {"message": "Password set"}
 
 
@@ -330,8 +392,9 @@ def password_reset_confirm(db: Session, payload: schemas.PasswordResetConfirmReq
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email is not verified")
 
     _validate_password_strength(payload.password)
-    db_user.hashed_password = hash_password(payload.password)
+    db_user.hashed_password = password_hasher.hash(payload.password)
     db_user.is_active = True
     db.commit()
+    principal_cache.invalidate(db_user.id)
     return {"message": "Password reset"}
 
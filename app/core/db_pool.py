@@ -0,0 +1,144 @@
+"""
+Connection pool configuration and metrics.
+
+Pool sizing comes from `Settings`; `DB_PGBOUNCER` switches to `NullPool` for deployments behind a
+transaction pooler, which owns pooling and can't keep prepared statements across transactions.
+Stats are per process, so multiply by the worker count when sizing against `max_connections`.
+Metrics belong to the engine rather than its pool, so they survive `engine.dispose()` and
+`NullPool`'s recreation; pool events are likewise listened for on the engine.
+"""
+
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolMetrics:
+    """Counters for one engine's pool, fed by pool events and by the metered pool classes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, engine: Engine) -> None:
+        _engine_metrics[engine] = self
+        engine.pool.metrics = self
+        # Registered on the engine, so they also apply to pools it swaps in later.
+        event.listen(engine, "connect", lambda *_: self._increment("connects"))
+        event.listen(engine, "checkout", lambda *_: self._increment("checkouts"))
+        event.listen(engine, "checkin", lambda *_: self._increment("checkins"))
+        event.listen(engine, "invalidate", lambda *_: self._increment("invalidations"))
+
+    def stats(self, pool) -> dict:
+        stats = {
+            "pool": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "wait_seconds_avg": self.wait_seconds_total / self.waits if self.waits else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                # Negative until the pool has opened `size` connections.
+                overflow=pool.overflow(),
+                max_overflow=pool._max_overflow,
+            )
+        return stats
+
+
+_engine_metrics: "weakref.WeakKeyDictionary[Engine, PoolMetrics]" = weakref.WeakKeyDictionary()
+
+
+class _MeteredPoolMixin:
+    """Times checkouts that have to wait for a connection because the pool is exhausted."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        # Same test `QueuePool` uses to decide whether to block: nothing idle and no overflow left.
+        # Checkouts served at once are only counted by the checkout event.
+        if self.checkedin() or self._max_overflow == -1 or self.overflow() < self._max_overflow:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started, timed_out=False)
+        return connection
+
+    def recreate(self):
+        # `engine.dispose()` swaps in a fresh pool; keep counting into the same metrics.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, is_async: bool = False) -> dict:
+    """Keyword arguments for `create_engine` / `create_async_engine` from the pool settings."""
+
+    if settings.db_pgbouncer:
+        options: dict = {"poolclass": NullPool}
+        if is_async:
+            # Transaction poolers hand each transaction a different server connection, so
+            # asyncpg must not cache prepared statements.
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    return {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def instrument(engine: Engine) -> None:
+    PoolMetrics().attach(engine)
+
+
+def pool_stats(engine: Engine) -> dict:
+    return _engine_metrics[engine].stats(engine.pool)
@@ -0,0 +1,287 @@
+"""
+Per-user server-sent events.
+
+Writers `publish()` a small JSON event after their transaction commits. The backend carries it to
+every worker ("memory" stays in this process; "postgres" goes through NOTIFY and each worker's
+LISTEN thread), and the broker fans it out to that user's open streams on the event loop.
+
+Each stream reads from a bounded queue. A consumer that falls behind doesn't make the server
+buffer without limit: its backlog is replaced by a single `resync` event, after which the client
+refetches (e.g. `/finance/changes`) instead of replaying every missed event.
+"""
+
+import asyncio
+import logging
+import select
+import threading
+from collections.abc import AsyncIterator
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC_EVENT = orjson.dumps({"type": "resync"})
+LISTEN_RECONNECT_SECONDS = 5.0
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+NOTIFY_MAX_PAYLOAD_BYTES = 7999
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int) -> None:
+        self.user_id = user_id
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max(queue_size, 1))
+
+
+class LocalEventBackend:
+    """Delivers straight to this process' broker; only streams on the same worker see events."""
+
+    broker: "EventBroker | None" = None
+
+    def start(self, broker: "EventBroker") -> None:
+        self.broker = broker
+
+    def stop(self) -> None:
+        pass
+
+    def publish(self, user_id: int, payload: bytes) -> None:
+        # Not started (CLI tools, scripts): there are no streams to deliver to.
+        if self.broker is not None:
+            self.broker.deliver(user_id, payload)
+
+
+class PostgresNotifyBackend:
+    """
+    Cross-worker fan-out over LISTEN/NOTIFY. The listener needs its own direct connection:
+    LISTEN does not work through a transaction-mode pooler such as PgBouncer.
+    """
+
+    channel = "finance_events"
+
+    def __init__(self, engine, dsn: str) -> None:
+        self.engine = engine
+        self.dsn = dsn
+        self.oversized = 0
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, broker: "EventBroker") -> None:
+        self.broker = broker
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="events-listen", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def publish(self, user_id: int, payload: bytes) -> None:
+        # Every worker, this one included, receives it back through its listener.
+        message = f"{user_id}:{payload.decode()}"
+        if len(message.encode()) > NOTIFY_MAX_PAYLOAD_BYTES:
+            # E.g. a very long description. The client refetches instead of missing the event.
+            message = f"{user_id}:{RESYNC_EVENT.decode()}"
+            self.oversized += 1
+        with self.engine.connect() as conn:
+            conn.execute(sql_select(func.pg_notify(self.channel, message)))
+            conn.commit()
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stopping.is_set():
+            try:
+                self._listen(resync=connected_before)
+            except Exception:
+                logger.exception("Event listener lost its connection; reconnecting")
+            connected_before = True
+            self._stopping.wait(LISTEN_RECONNECT_SECONDS)
+
+    def _listen(self, resync: bool) -> None:
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {self.channel}")
+            if resync:
+                # Notifications sent while we were disconnected are lost.
+                self.broker.resync_all()
+            while not self._stopping.is_set():
+                if not select.select([conn], [], [], 1.0)[0]:
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    user_id, _, payload = notify.payload.partition(":")
+                    self.broker.deliver(int(user_id), payload.encode())
+        finally:
+            conn.close()
+
+
+class EventBroker:
+    def __init__(self, backend, queue_size: int, max_connections_per_user: int) -> None:
+        self.backend = backend
+        self.queue_size = queue_size
+        self.max_connections_per_user = max_connections_per_user
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self.connections_total = 0
+        self.rejected = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        self.backend.start(self)
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    def publish(self, user_id: int, event: dict) -> None:
+        """Send `event` to the user's streams on every worker. Never raises into the writer."""
+
+        try:
+            self.backend.publish(user_id, orjson.dumps(event))
+        except Exception:
+            logger.exception("Failed to publish a change event for user %s", user_id)
+            return
+        with self._lock:
+            self.published += 1
+
+    def subscribe(self, user_id: int) -> Subscription | None:
+        """
+        Register a stream, or return None when the user already has the maximum open. Must be
+        called on the event loop, which `deliver()` then hands events to.
+        """
+
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            # Checked and registered under one lock, so concurrent connects can't overshoot.
+            subscribers = self._subscribers.setdefault(user_id, set())
+            if len(subscribers) >= self.max_connections_per_user:
+                self.rejected += 1
+                return None
+            self._loop = asyncio.get_running_loop()
+            subscribers.add(subscription)
+            self.connections_total += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def deliver(self, user_id: int, payload: bytes) -> None:
+        """Queue `payload` for the user's local streams. Safe to call from any thread."""
+
+        with self._lock:
+            if user_id not in self._subscribers or self._loop is None:
+                return
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(self._fan_out, user_id, payload)
+        except RuntimeError:
+            # The loop closed during shutdown.
+            pass
+
+    def resync_all(self) -> None:
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.deliver(user_id, RESYNC_EVENT)
+
+    def _fan_out(self, user_id: int, payload: bytes) -> None:
+        # Runs on the event loop thread, the only one that touches the queues.
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            queue = subscription.queue
+            try:
+                queue.put_nowait(payload)
+                delivered, dropped, overflowed = 1, 0, 0
+            except asyncio.QueueFull:
+                delivered, dropped, overflowed = 0, queue.qsize() + 1, 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+            with self._lock:
+                self.delivered += delivered
+                self.dropped += dropped
+                self.overflows += overflowed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": settings.events_backend,
+                "connections": sum(len(subs) for subs in self._subscribers.values()),
+                "users": len(self._subscribers),
+                "connections_total": self.connections_total,
+                "rejected": self.rejected,
+                "published": self.published,
+                "delivered": self.delivered,
+                "overflows": self.overflows,
+                "dropped": self.dropped,
+                "oversized": getattr(self.backend, "oversized", 0),
+            }
+
+    async def _stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.events_heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle stream.
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"data: " + payload + b"\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def stream_response(self, user_id: int) -> StreamingResponse:
+        """Call from an async route: the subscription is registered on the event loop."""
+
+        subscription = self.subscribe(user_id)
+        if subscription is None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many open event streams for this user",
+            )
+        return StreamingResponse(
+            self._stream(subscription),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+def build_backend():
+    if settings.events_backend == "memory":
+        return LocalEventBackend()
+    if settings.events_backend == "postgres":
+        from app.database import engine
+
+        dsn = make_url(settings.db_url).set(drivername="postgresql")
+        return PostgresNotifyBackend(engine, dsn.render_as_string(hide_password=False))
+    raise RuntimeError(f"Unknown EVENTS_BACKEND: {settings.events_backend!r}")
+
+
+event_broker = EventBroker(
+    build_backend(),
+    queue_size=settings.events_queue_size,
+    max_connections_per_user=settings.events_max_connections_per_user,
+)
@@ -0,0 +1,173 @@
+"""
+Sliding-window rate limits for expensive endpoints.
+
+Each limit is "N requests per W seconds" for one key (client IP or submitted identifier) within
+an endpoint class. The count is the sliding-window approximation: this window's hits plus the
+previous window's hits weighted by how much of it still overlaps. That needs two counters per key
+and one round trip, and every check happens before the route touches the database or hasher.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+@dataclass(frozen=True)
+class Limit:
+    requests: int
+    window_seconds: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        """`"10/60"` is 10 requests per 60 seconds."""
+
+        requests, _, window = spec.partition("/")
+        return cls(int(requests), int(window))
+
+
+class MemoryRateLimitBackend:
+    """Window counters in an LRU dict of at most `max_keys` keys."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window_index: int, window_seconds: int) -> tuple[int, int]:
+        current_key = f"{key}:{window_index}"
+        with self._lock:
+            current = self._counts.get(current_key, 0) + 1
+            self._counts[current_key] = current
+            previous = self._counts.get(f"{key}:{window_index - 1}", 0)
+            # Oldest keys first: a key's old windows are dropped before its live ones.
+            while len(self._counts) > self.max_keys:
+                self._counts.popitem(last=False)
+        return current, previous
+
+
+class RedisRateLimitBackend:
+    """Counters shared by every worker; each window's key expires once it can't be read again."""
+
+    def __init__(self, client, prefix: str = "ratelimit") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, window_index: int, window_seconds: int) -> tuple[int, int]:
+        current_key = f"{self.prefix}:{key}:{window_index}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window_seconds * 2)
+        pipe.get(f"{self.prefix}:{key}:{window_index - 1}")
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+
+class RateLimiter:
+    def __init__(self, backend, limits: dict[str, dict[str, Limit]]) -> None:
+        self.backend = backend
+        # endpoint class -> {"ip": Limit, "identifier": Limit}
+        self.limits = limits
+        self._lock = threading.Lock()
+        self.allowed: dict[str, int] = {}
+        self.rejected: dict[str, int] = {}
+
+    def _retry_after(self, endpoint_class: str, scope: str, value: str) -> int | None:
+        limit = self.limits[endpoint_class].get(scope)
+        if limit is None:
+            return None
+        now = time.time()
+        window_index, offset = divmod(now, limit.window_seconds)
+        current, previous = self.backend.hit(
+            f"{endpoint_class}:{scope}:{value}", int(window_index), limit.window_seconds
+        )
+        overlap = 1.0 - offset / limit.window_seconds
+        if current + previous * overlap <= limit.requests:
+            return None
+        return max(1, math.ceil(limit.window_seconds - offset))
+
+    def check(self, request: Request, endpoint_class: str, identifier: str | None = None) -> None:
+        """Count this request and raise 429 if any of its limits is exceeded."""
+
+        if not settings.rate_limit_enabled:
+            return
+        retry_after = self._retry_after(endpoint_class, "ip", client_ip(request))
+        # Only requests within their IP's limit count against the identifier: a rejected request
+        # must not add keys, or a flood of random identifiers would evict the per-IP counters
+        # from the memory backend.
+        if retry_after is None and identifier:
+            retry_after = self._retry_after(
+                endpoint_class, "identifier", identifier.strip().lower()
+            )
+        with self._lock:
+            counter = self.allowed if retry_after is None else self.rejected
+            counter[endpoint_class] = counter.get(endpoint_class, 0) + 1
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    async def acheck(
+        self, request: Request, endpoint_class: str, identifier: str | None = None
+    ) -> None:
+        """`check` for async routes."""
+
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            self.check(request, endpoint_class, identifier)
+            return
+        # The Redis client blocks; keep its round trips off the event loop.
+        await run_in_threadpool(self.check, request, endpoint_class, identifier)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"allowed": dict(self.allowed), "rejected": dict(self.rejected)}
+
+
+def client_ip(request: Request) -> str:
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def auth_limits() -> dict[str, dict[str, Limit]]:
+    return {
+        # PBKDF2 verification per attempt.
+        "login": {
+            "ip": Limit.parse(settings.rate_limit_login_per_ip),
+            "identifier": Limit.parse(settings.rate_limit_login_per_identifier),
+        },
+        # An SMTP send per request.
+        "email": {
+            "ip": Limit.parse(settings.rate_limit_email_per_ip),
+            "identifier": Limit.parse(settings.rate_limit_email_per_identifier),
+        },
+        # Guessing 6-digit codes.
+        "otp_verify": {
+            "ip": Limit.parse(settings.rate_limit_otp_verify_per_ip),
+            "identifier": Limit.parse(settings.rate_limit_otp_verify_per_identifier),
+        },
+        # PBKDF2 hash per request; the identifier is inside a signed token.
+        "password_set": {"ip": Limit.parse(settings.rate_limit_password_set_per_ip)},
+    }
+
+
+def build_backend():
+    if settings.rate_limit_backend == "memory":
+        return MemoryRateLimitBackend(settings.rate_limit_max_keys)
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimitBackend(get_redis())
+    raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND: {settings.rate_limit_backend!r}")
+
+
+rate_limiter = RateLimiter(build_backend(), auth_limits())
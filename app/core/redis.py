@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis(url: str | None = None):
+    """Shared Redis client for cross-worker state. `redis` is only imported when a backend needs it."""
+
+    url = url or settings.redis_url
+    if not url:
+        raise RuntimeError("REDIS_URL is required for Redis-backed caches.")
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("The redis package is required for Redis-backed caches.") from exc
+    return redis.Redis.from_url(url)
@@ -0,0 +1,78 @@
+"""
+Routing state for the optional read replica.
+
+A user who just wrote is pinned to the primary for `REPLICA_STICKINESS_SECONDS`, so they read
+their own writes while the replica catches up; the window must exceed the replica's lag. When
+the replica can't be reached, reads go to the primary for `REPLICA_RETRY_SECONDS` before it is
+tried again, so an outage costs one failed connect per process rather than one per request.
+"""
+
+import threading
+import time
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+class MemoryStickiness:
+    """Write marks in a dict, pruned of expired ones as it grows."""
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_id: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._until[user_id] = now + self.window_seconds
+            # Drop expired marks now and then so the dict stays bounded by recent writers.
+            if len(self._until) > 10_000:
+                self._until = {uid: until for uid, until in self._until.items() if until > now}
+
+    def is_sticky(self, user_id: int) -> bool:
+        return self._until.get(user_id, 0.0) > time.monotonic()
+
+
+class RedisStickiness:
+    """Write marks shared by every worker, stored as keys that expire with the window."""
+
+    def __init__(self, client, window_seconds: float, prefix: str = "finance:replica-sticky") -> None:
+        self.client = client
+        self.window_ms = max(1, int(window_seconds * 1000))
+        self.prefix = prefix
+
+    def mark_write(self, user_id: int) -> None:
+        self.client.set(f"{self.prefix}:{user_id}", 1, px=self.window_ms)
+
+    def is_sticky(self, user_id: int) -> bool:
+        return bool(self.client.exists(f"{self.prefix}:{user_id}"))
+
+
+class ReplicaHealth:
+    def __init__(self, retry_seconds: float) -> None:
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+        self.fallbacks = 0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self) -> None:
+        self._down_until = time.monotonic() + self.retry_seconds
+        self.fallbacks += 1
+
+
+def build_stickiness():
+    window = settings.replica_stickiness_seconds
+    if settings.replica_stickiness_backend == "memory":
+        return MemoryStickiness(window)
+    if settings.replica_stickiness_backend == "redis":
+        return RedisStickiness(get_redis(), window)
+    raise RuntimeError(
+        f"Unknown REPLICA_STICKINESS_BACKEND: {settings.replica_stickiness_backend!r}"
+    )
+
+
+primary_stickiness = build_stickiness()
+replica_health = ReplicaHealth(settings.replica_retry_seconds)
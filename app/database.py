@@ -1,61 +1,70 @@
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.orm import declarative_base, sessionmaker
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.db_pool import engine_options, instrument
+from app.core.replica import replica_health
+
+logger = logging.getLogger(__name__)
 
-engine = create_engine(settings.db_url, future=True)
+engine = create_engine(settings.db_url, future=True, **engine_options())
+instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
 
-def ensure_schema() -> None:
-    """
-    Minimal dev migration helper.
-
-    This project currently uses `Base.metadata.create_all()` (no Alembic). That won't add new
-    columns to existing tables. For local dev/test, we add missing columns with `ALTER TABLE`.
-    """
-
-    inspector = inspect(engine)
-    if "users" not in inspector.get_table_names():
-        return
-
-    existing = {col["name"] for col in inspector.get_columns("users")}
-    statements: list[str] = []
-
-    if "first_name" not in existing:
-        statements.append("ALTER TABLE users ADD COLUMN IF NOT EXISTS first_name VARCHAR")
-    if "last_name" not in existing:
-        statements.append("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_name VARCHAR")
-    if "username" not in existing:
-        statements.append("ALTER TABLE users ADD COLUMN IF NOT EXISTS username VARCHAR")
-    if "phone" not in existing:
-        statements.append("ALTER TABLE users ADD COLUMN IF NOT EXISTS phone VARCHAR")
-    if "email_verified" not in existing:
-        statements.append(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS email_verified BOOLEAN NOT NULL DEFAULT FALSE"
-        )
-    if "is_active" not in existing:
-        statements.append(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT FALSE"
-        )
-    if "created_at" not in existing:
-        statements.append(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()"
+
+def async_db_url(sync_url: str | None = None) -> str:
+    if sync_url is None and settings.async_db_url:
+        return settings.async_db_url
+    url = make_url(sync_url or settings.db_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
+
+# Only built when the API runs async, so the sync deployment doesn't need asyncpg installed.
+async_engine = None
+if settings.db_async:
+    async_engine = create_async_engine(async_db_url(), **engine_options(is_async=True))
+    instrument(async_engine.sync_engine)
+# Sessions must not expire loaded objects on commit: refreshing them would need implicit IO,
+# which an AsyncSession can't do outside `run_sync`.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+replica_engine = async_replica_engine = None
+if settings.replica_db_url:
+    replica_engine = create_engine(settings.replica_db_url, future=True, **engine_options())
+    instrument(replica_engine)
+    if settings.db_async:
+        async_replica_engine = create_async_engine(
+            async_db_url(settings.replica_db_url), **engine_options(is_async=True)
         )
+        instrument(async_replica_engine.sync_engine)
+# Replica sessions are tagged so callers can tell their reads may lag the primary.
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine, info={"replica": True}
+)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    async_replica_engine, autoflush=False, expire_on_commit=False, info={"replica": True}
+)
+
+
+def is_replica(db: Session | AsyncSession) -> bool:
+    return db.info.get("replica", False)
+
 
-    if not statements:
-        # Ensure index for username if column already exists.
-        with engine.begin() as conn:
-            conn.execute(
-                text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)")
-            )
-        return
+def dialect_insert(db: Session):
+    """`insert()` with ON CONFLICT support for the session's dialect (Postgres; SQLite for local runs)."""
 
-    with engine.begin() as conn:
-        for stmt in statements:
-            conn.execute(text(stmt))
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)"))
+    return sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
 
 
 def get_db():
@@ -64,3 +73,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def open_replica_session() -> Session | None:
+    """A session already connected to the replica, or None when reads should use the primary."""
+
+    if replica_engine is None or not replica_health.available():
+        return None
+    db = ReplicaSessionLocal()
+    try:
+        db.connection()
+    except OperationalError:
+        db.close()
+        replica_health.mark_down()
+        logger.warning("Read replica unreachable; reading from the primary", exc_info=True)
+        return None
+    return db
+
+
+async def open_async_replica_session() -> AsyncSession | None:
+    if async_replica_engine is None or not replica_health.available():
+        return None
+    db = AsyncReplicaSessionLocal()
+    try:
+        await db.connection()
+    except (OperationalError, OSError):
+        # asyncpg can surface refused or dropped connects as plain OSErrors.
+        await db.close()
+        replica_health.mark_down()
+        logger.warning("Read replica unreachable; reading from the primary", exc_info=True)
+        return None
+    return db
@@ -0,0 +1,248 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.finance import async_service, schemas, service
+from app.auth.async_service import get_current_user, get_streaming_user
+from app.auth.models import User
+from app.core.events import event_broker
+from app.database import get_async_db
+from app.finance.dependencies import (
+    CATEGORY_SCOPES,
+    REPORT_SCOPES,
+    TRANSACTION_SCOPES,
+    async_not_modified_guard,
+    get_async_read_db,
+)
+from app.finance.router import FIELDS_DESCRIPTION
+
+router = APIRouter(prefix="/finance", tags=["finance"])
+
+
+@router.post("/categories", response_model=schemas.CategoryRead, status_code=status.HTTP_201_CREATED)
+async def create_category(
+    payload: schemas.CategoryCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await async_service.create_category(db, current_user, payload)
+
+
+@router.get("/categories", response_model=list[schemas.CategoryRead])
+async def list_categories(
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(async_not_modified_guard(CATEGORY_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    content = await async_service.list_categories(db, current_user, fields)
+    return Response(content, media_type="application/json", headers=cache_headers)
+
+
+@router.post("/transactions", response_model=schemas.TransactionRead, status_code=status.HTTP_201_CREATED)
+async def create_transaction(
+    payload: schemas.TransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await async_service.create_transaction(db, current_user, payload)
+
+
+@router.post("/transactions/import", response_model=schemas.TransactionImportResult)
+async def import_transactions(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+):
+    return await async_service.import_transactions_csv(current_user, file.file)
+
+
+@router.post("/transactions/batch", response_model=schemas.TransactionBatchResult)
+async def apply_transaction_batch(
+    payload: schemas.TransactionBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await async_service.apply_transaction_batch(db, current_user, payload)
+
+
+@router.get("/transactions", response_model=schemas.TransactionPage)
+async def list_transactions(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(async_not_modified_guard(TRANSACTION_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    page = await async_service.list_transactions(
+        db,
+        current_user,
+        start_date=start_date,
+        end_date=end_date,
+        category_id=category_id,
+        transaction_type=transaction_type,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
+    return Response(page, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/transactions/search", response_model=schemas.TransactionPage)
+async def search_transactions(
+    q: str = Query(min_length=service.SEARCH_MIN_LENGTH, max_length=200),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(async_not_modified_guard(TRANSACTION_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    page = await async_service.search_transactions(
+        db,
+        current_user,
+        q,
+        start_date=start_date,
+        end_date=end_date,
+        category_id=category_id,
+        transaction_type=transaction_type,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
+    return Response(page, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/changes", response_model=schemas.ChangeSet)
+async def list_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    content = await async_service.list_changes(db, current_user, since, limit)
+    return Response(content, media_type="application/json")
+
+
+@router.get("/events")
+async def change_events(current_user: User = Depends(get_streaming_user)):
+    return event_broker.stream_response(current_user.id)
+
+
+@router.get("/transactions/export")
+async def export_transactions(
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    chunks = async_service.export_transactions(
+        db,
+        current_user,
+        export_format,
+        start_date=start_date,
+        end_date=end_date,
+        category_id=category_id,
+        transaction_type=transaction_type,
+    )
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'},
+    )
+
+
+@router.put("/transactions/{transaction_id}", response_model=schemas.TransactionRead)
+async def update_transaction(
+    transaction_id: int,
+    payload: schemas.TransactionUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await async_service.update_transaction(db, current_user, transaction_id, payload)
+
+
+@router.delete("/transactions/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_transaction(
+    transaction_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    await async_service.delete_transaction(db, current_user, transaction_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/reports/summary", response_model=schemas.FinanceSummary)
+async def report_summary(
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(async_not_modified_guard(REPORT_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return await async_service.get_summary(
+        db, current_user, start_date=start_date, end_date=end_date
+    )
+
+
+@router.get("/reports/category-breakdown", response_model=list[schemas.CategoryBreakdown])
+async def report_category_breakdown(
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(async_not_modified_guard(REPORT_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return await async_service.get_category_breakdown(
+        db, current_user, start_date=start_date, end_date=end_date
+    )
+
+
+@router.get("/reports/timeseries", response_model=schemas.CashflowTimeseries)
+async def report_timeseries(
+    response: Response,
+    granularity: Literal["day", "week", "month"] = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(async_not_modified_guard(REPORT_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return await async_service.get_cashflow_timeseries(
+        db, current_user, granularity=granularity, start_date=start_date, end_date=end_date
+    )
+
+
+@router.get("/reports/dashboard", response_model=schemas.DashboardReport)
+async def report_dashboard(
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(async_not_modified_guard(REPORT_SCOPES)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return await async_service.get_dashboard(
+        db, current_user, start_date=start_date, end_date=end_date
+    )
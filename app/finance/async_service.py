@@ -0,0 +1,151 @@
+"""
+Async entry points for the finance service.
+
+Each call runs the sync implementation in `service` through `AsyncSession.run_sync`, which
+drives it on the asyncpg connection inside a greenlet: the SQL is identical, but the request
+waits on the event loop instead of holding a threadpool slot for the whole round trip. Writes go
+through `_write`, which runs their post-commit side effects (cache invalidation, replica
+stickiness, NOTIFY) on the threadpool afterwards, since those make blocking round trips.
+"""
+
+from collections.abc import AsyncIterator, Callable
+from datetime import date
+from typing import BinaryIO
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.database import SessionLocal
+from app.finance import schemas, service, sync
+
+
+def _run_effects(effects: list[Callable[[], None]]) -> None:
+    for effect in effects:
+        effect()
+
+
+async def _write(db: AsyncSession, fn, *args):
+    effects: list[Callable[[], None]] = []
+    db.info[service.DEFERRED_EFFECTS] = effects
+    try:
+        return await db.run_sync(fn, *args)
+    finally:
+        del db.info[service.DEFERRED_EFFECTS]
+        # Also after a failure: a write may have committed before the error (e.g. a CSV import).
+        if effects:
+            await run_in_threadpool(_run_effects, effects)
+
+
+async def create_category(
+    db: AsyncSession, current_user: User, payload: schemas.CategoryCreate
+) -> schemas.CategoryRead:
+    return await _write(db, service.create_category, current_user, payload)
+
+
+async def list_categories(db: AsyncSession, current_user: User, fields: str | None = None) -> bytes:
+    return await db.run_sync(service.list_categories, current_user, fields)
+
+
+async def create_transaction(
+    db: AsyncSession, current_user: User, payload: schemas.TransactionCreate
+):
+    return await _write(db, service.create_transaction, current_user, payload)
+
+
+async def import_transactions_csv(
+    current_user: User, stream: BinaryIO
+) -> schemas.TransactionImportResult:
+    # `run_sync` would run the whole parse and COPY on the event loop thread, stalling every
+    # other request on this worker; a large import gets a sync session on the threadpool instead.
+    def run() -> schemas.TransactionImportResult:
+        with SessionLocal() as db:
+            return service.import_transactions_csv(db, current_user, stream)
+
+    return await run_in_threadpool(run)
+
+
+async def apply_transaction_batch(
+    db: AsyncSession, current_user: User, payload: schemas.TransactionBatchRequest
+) -> schemas.TransactionBatchResult:
+    return await _write(db, service.apply_transaction_batch, current_user, payload)
+
+
+async def list_transactions(db: AsyncSession, current_user: User, **filters) -> bytes:
+    return await db.run_sync(lambda sync_db: service.list_transactions(sync_db, current_user, **filters))
+
+
+async def search_transactions(db: AsyncSession, current_user: User, q: str, **filters) -> bytes:
+    return await db.run_sync(
+        lambda sync_db: service.search_transactions(sync_db, current_user, q, **filters)
+    )
+
+
+async def list_changes(db: AsyncSession, current_user: User, since: int, limit: int) -> bytes:
+    return await db.run_sync(sync.list_changes, current_user, since, limit)
+
+
+def export_transactions(
+    db: AsyncSession,
+    current_user: User,
+    export_format: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+) -> AsyncIterator[bytes]:
+    """Async counterpart of `service.export_transactions`, streaming over its own connection."""
+
+    statement = service.export_statement(
+        current_user, start_date, end_date, category_id, transaction_type
+    )
+    return _stream_export(db.bind, statement, export_format)
+
+
+async def _stream_export(bind, statement, export_format: str) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        yield service.export_header(export_format)
+
+    async with bind.connect() as conn:
+        result = await conn.stream(
+            statement.execution_options(yield_per=service.EXPORT_BATCH_SIZE)
+        )
+        async for batch in result.partitions():
+            yield service.encode_export_batch(batch, export_format)
+
+
+async def update_transaction(
+    db: AsyncSession,
+    current_user: User,
+    transaction_id: int,
+    payload: schemas.TransactionUpdate,
+):
+    return await _write(db, service.update_transaction, current_user, transaction_id, payload)
+
+
+async def delete_transaction(db: AsyncSession, current_user: User, transaction_id: int) -> None:
+    await _write(db, service.delete_transaction, current_user, transaction_id)
+
+
+async def get_summary(db: AsyncSession, current_user: User, **params) -> schemas.FinanceSummary:
+    return await db.run_sync(lambda sync_db: service.get_summary(sync_db, current_user, **params))
+
+
+async def get_category_breakdown(
+    db: AsyncSession, current_user: User, **params
+) -> list[schemas.CategoryBreakdown]:
+    return await db.run_sync(
+        lambda sync_db: service.get_category_breakdown(sync_db, current_user, **params)
+    )
+
+
+async def get_cashflow_timeseries(
+    db: AsyncSession, current_user: User, **params
+) -> schemas.CashflowTimeseries:
+    return await db.run_sync(
+        lambda sync_db: service.get_cashflow_timeseries(sync_db, current_user, **params)
+    )
+
+
+async def get_dashboard(db: AsyncSession, current_user: User, **params) -> schemas.DashboardReport:
+    return await db.run_sync(lambda sync_db: service.get_dashboard(sync_db, current_user, **params))
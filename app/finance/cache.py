@@ -0,0 +1,269 @@
+"""
+Per-user versioned cache for finance reads.
+
+Entries are keyed by user, endpoint, parameters and the user's current version for a scope.
+Finance writes bump the "data" version after they commit, so entries computed before the write
+are never looked up again and simply age out of the LRU (or expire, for Redis). Category writes
+bump the separate "categories" version, which the category directory is keyed on, so
+transaction writes don't discard it.
+"""
+
+import hashlib
+import json
+import secrets
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.database import is_replica
+from app.finance.models import Category
+
+
+class MemoryCacheBackend:
+    """In-process LRU. Versions live in this process, so it only suits single-worker deployments."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._versions: dict[tuple[str, int], int] = {}
+        # Versions restart at 0 with the process; the epoch tells those apart from earlier ones.
+        self.epoch = secrets.token_hex(8)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self, user_id: int, scope: str) -> int:
+        return self._versions.get((scope, user_id), 0)
+
+    def bump_version(self, user_id: int, scope: str) -> int:
+        with self._lock:
+            self._versions[(scope, user_id)] = self._versions.get((scope, user_id), 0) + 1
+            return self._versions[(scope, user_id)]
+
+    def versions(self, user_id: int, scopes) -> tuple[str, list[int]]:
+        return self.epoch, [self.version(user_id, scope) for scope in scopes]
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCacheBackend:
+    """
+    Shared backend: every worker sees the same versions, so a write on one worker invalidates
+    reads on all of them. Size is bounded by the entry TTL plus Redis' own LRU eviction
+    (`maxmemory-policy allkeys-lru`); the eviction counter reports Redis' `evicted_keys`.
+    """
+
+    prefix = "finance:cache"
+
+    def __init__(self, client, ttl_seconds: int) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        raw = self.client.get(f"{self.prefix}:{key}")
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(f"{self.prefix}:{key}", json.dumps(value), ex=self.ttl_seconds)
+
+    def version(self, user_id: int, scope: str) -> int:
+        return int(self.client.get(f"{self.prefix}:version:{scope}:{user_id}") or 0)
+
+    def bump_version(self, user_id: int, scope: str) -> int:
+        return int(self.client.incr(f"{self.prefix}:version:{scope}:{user_id}"))
+
+    def versions(self, user_id: int, scopes) -> tuple[str, list[int]]:
+        """The epoch and the user's versions for `scopes`, in one round trip."""
+
+        keys = [f"{self.prefix}:epoch"]
+        keys += [f"{self.prefix}:version:{scope}:{user_id}" for scope in scopes]
+        epoch, *values = self.client.mget(keys)
+        if epoch is None:
+            # A flushed or new Redis restarts every version at 0; a new epoch keeps ETags issued
+            # before that from matching again.
+            self.client.set(keys[0], secrets.token_hex(8), nx=True)
+            epoch, *values = self.client.mget(keys)
+        return epoch.decode(), [int(value or 0) for value in values]
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": int(self.client.info("stats").get("evicted_keys", 0)),
+        }
+
+
+class ReportCache:
+    def __init__(self, backend) -> None:
+        self.backend = backend
+
+    def _key(self, user_id: int, endpoint: str, params: dict, scope: str) -> str:
+        encoded_params = json.dumps(params, sort_keys=True, default=str)
+        version = self.backend.version(user_id, scope)
+        return f"{user_id}:{scope}:{version}:{endpoint}:{encoded_params}"
+
+    def get_or_compute(
+        self,
+        user_id: int,
+        endpoint: str,
+        params: dict,
+        compute: Callable[[], Any],
+        scope: str = "data",
+        store: bool = True,
+    ) -> Any:
+        """
+        Return the cached value for this read, computing and storing it on a miss.
+
+        `compute` must return JSON-serializable data so every backend can store it. Pass
+        `store=False` when it reads a replica: its result may predate the current version, and
+        stored under it would be served until the next write.
+        """
+
+        key = self._key(user_id, endpoint, params, scope)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            if store:
+                self.backend.set(key, value)
+        return value
+
+    def refresh(
+        self,
+        user_id: int,
+        endpoint: str,
+        params: dict,
+        compute: Callable[[], Any],
+        scope: str = "data",
+        store: bool = True,
+    ) -> Any:
+        """Recompute and store a value, bypassing whatever is cached."""
+
+        value = compute()
+        if store:
+            self.backend.set(self._key(user_id, endpoint, params, scope), value)
+        return value
+
+    def invalidate_user(self, user_id: int, scope: str = "data") -> None:
+        self.backend.bump_version(user_id, scope)
+
+    def etag(self, user_id: int, endpoint: str, params, scopes) -> str:
+        """
+        Strong ETag for a read that depends on `scopes`: it changes with every write that bumps
+        one of them, so it must be computed before the read, never after.
+        """
+
+        epoch, versions = self.backend.versions(user_id, scopes)
+        payload = json.dumps([epoch, versions, endpoint, params], sort_keys=True, default=str)
+        return f'"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+def build_backend():
+    if settings.report_cache_backend == "memory":
+        return MemoryCacheBackend(settings.report_cache_max_entries)
+    if settings.report_cache_backend == "redis":
+        return RedisCacheBackend(get_redis(), settings.report_cache_ttl_seconds)
+    raise RuntimeError(f"Unknown REPORT_CACHE_BACKEND: {settings.report_cache_backend!r}")
+
+
+class CategoryDirectory:
+    """
+    Per-user `{category_id: name}` map, ordered by name.
+
+    Serves category ownership checks and id/name resolution without a `categories` query on
+    every write or report. Categories are only ever added, so a cached directory can only be
+    missing entries; `lookup()` reloads once before treating an id as unknown.
+    """
+
+    scope = "categories"
+
+    def __init__(self, cache: ReportCache) -> None:
+        self.cache = cache
+
+    @staticmethod
+    def _load(db: Session, user_id: int) -> list[list]:
+        rows = db.execute(
+            select(Category.id, Category.name)
+            .where(Category.user_id == user_id)
+            .order_by(Category.name.asc())
+        )
+        return [[category_id, name] for category_id, name in rows]
+
+    def get(self, db: Session, user_id: int) -> dict[int, str]:
+        pairs = self.cache.get_or_compute(
+            user_id,
+            "category-directory",
+            {},
+            lambda: self._load(db, user_id),
+            scope=self.scope,
+            store=not is_replica(db),
+        )
+        return {category_id: name for category_id, name in pairs}
+
+    def reload(self, db: Session, user_id: int) -> dict[int, str]:
+        pairs = self.cache.refresh(
+            user_id,
+            "category-directory",
+            {},
+            lambda: self._load(db, user_id),
+            scope=self.scope,
+            store=not is_replica(db),
+        )
+        return {category_id: name for category_id, name in pairs}
+
+    def lookup(self, db: Session, user_id: int, category_ids) -> dict[int, str]:
+        """Return the directory, reloaded first if any of `category_ids` is missing from it."""
+
+        directory = self.get(db, user_id)
+        if any(category_id not in directory for category_id in category_ids):
+            directory = self.reload(db, user_id)
+        return directory
+
+    def invalidate(self, user_id: int) -> None:
+        self.cache.invalidate_user(user_id, scope=self.scope)
+
+
+report_cache = ReportCache(build_backend())
+category_directory = CategoryDirectory(report_cache)
@@ -0,0 +1,115 @@
+"""
+Session and conditional-GET dependencies for read-only finance routes.
+
+Reads go to the replica when one is configured and reachable, unless the user wrote within the
+stickiness window, in which case they stay on the primary to see their own writes.
+
+Polled reads carry an ETag derived from the user's report-cache versions (bumped by every finance
+write) and the query parameters. A matching `If-None-Match` is answered with 304 by a dependency
+declared ahead of the session, so an unchanged poll costs a version lookup and no database work.
+Only bodies read from the primary get an ETag: a lagging replica's body may predate the current
+versions, and revalidating it would keep returning 304 for stale data until the next write.
+"""
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.auth import async_service as auth_async_service
+from app.auth.models import User
+from app.auth.service import get_current_user
+from app.core.replica import primary_stickiness
+from app.database import get_async_db, get_db, open_async_replica_session, open_replica_session
+from app.finance.cache import MemoryCacheBackend, category_directory, report_cache
+
+TRANSACTION_SCOPES = ("data",)
+CATEGORY_SCOPES = (category_directory.scope,)
+# Breakdowns carry category names, so reports also change with the category directory.
+REPORT_SCOPES = ("data", category_directory.scope)
+
+
+def _drop_etag(request: Request) -> None:
+    headers = getattr(request.state, "cache_headers", None)
+    if headers is not None:
+        headers.pop("ETag", None)
+
+
+def get_read_db(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    replica = None if primary_stickiness.is_sticky(current_user.id) else open_replica_session()
+    if replica is None:
+        yield db
+        return
+    _drop_etag(request)
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_async_read_db(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(auth_async_service.get_current_user),
+):
+    replica = None
+    if not primary_stickiness.is_sticky(current_user.id):
+        replica = await open_async_replica_session()
+    if replica is None:
+        yield db
+        return
+    _drop_etag(request)
+    try:
+        yield replica
+    finally:
+        await replica.close()
+
+
+def _if_none_match(request: Request) -> set[str]:
+    header = request.headers.get("if-none-match", "")
+    # If-None-Match uses weak comparison: W/"x" matches "x".
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def _check_not_modified(request: Request, user_id: int, scopes) -> dict[str, str]:
+    etag = report_cache.etag(
+        user_id, request.url.path, sorted(request.query_params.multi_items()), scopes
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    candidates = _if_none_match(request)
+    if etag in candidates or "*" in candidates:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # The route sends this same dict; the read-session dependency drops the ETag from it when
+    # the body comes from the replica.
+    request.state.cache_headers = headers
+    return headers
+
+
+def not_modified_guard(scopes):
+    """
+    Dependency that answers 304 for a current `If-None-Match` and otherwise returns the caching
+    headers for the response. Declare it before the session dependency.
+    """
+
+    def dependency(
+        request: Request, current_user: User = Depends(get_current_user)
+    ) -> dict[str, str]:
+        return _check_not_modified(request, current_user.id, scopes)
+
+    return dependency
+
+
+def async_not_modified_guard(scopes):
+    async def dependency(
+        request: Request, current_user: User = Depends(auth_async_service.get_current_user)
+    ) -> dict[str, str]:
+        if isinstance(report_cache.backend, MemoryCacheBackend):
+            return _check_not_modified(request, current_user.id, scopes)
+        # The Redis client blocks; keep its round trips off the event loop.
+        return await run_in_threadpool(_check_not_modified, request, current_user.id, scopes)
+
+    return dependency
@@ -0,0 +1,135 @@
+"""
+Benchmark of the list endpoints' response path.
+
+Seeds one user's ledger inside a transaction that is rolled back at the end, then times building
+the response body for a full transaction page and the category list two ways: the previous path
+(ORM rows validated through the response models and encoded with the standard JSON encoder, as
+FastAPI does for a `response_model`) and the service's column-tuple + orjson path. Exits non-zero
+if the transaction page speedup is below `--min-speedup`.
+
+    python -m app.finance.list_bench [--rows 5000] [--limit 500] [--repeat 50] [--min-speedup 2]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.database import engine
+from app.finance import schemas, service
+from app.finance.models import Category, Transaction
+
+SEED_CATEGORIES = 20
+
+
+def _seed(db: Session, rows: int) -> User:
+    user_id = db.execute(
+        insert(User).returning(User.id),
+        [{"email": "list-bench@example.invalid", "hashed_password": "!"}],
+    ).scalar_one()
+    category_ids = db.execute(
+        insert(Category).returning(Category.id),
+        [{"user_id": user_id, "name": f"Category {i}"} for i in range(SEED_CATEGORIES)],
+    ).scalars().all()
+    start = date(2020, 1, 1)
+    db.execute(
+        insert(Transaction),
+        [
+            {
+                "user_id": user_id,
+                "category_id": category_ids[i % SEED_CATEGORIES] if i % 7 else None,
+                "description": f"Benchmark transaction {i}",
+                "amount": float(1 + i % 97),
+                "transaction_type": "income" if i % 5 == 0 else "expense",
+                "date": start + timedelta(days=i % 1500),
+            }
+            for i in range(rows)
+        ],
+    )
+    return db.get(User, user_id)
+
+
+def _model_transaction_page(db: Session, user: User, limit: int) -> bytes:
+    rows = (
+        db.query(Transaction)
+        .filter(Transaction.user_id == user.id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = schemas.TransactionPage.model_validate({"items": rows[:limit], "next_cursor": None})
+    return json.dumps(jsonable_encoder(page)).encode("utf-8")
+
+
+def _model_categories(db: Session, user: User) -> bytes:
+    rows = db.query(Category).filter(Category.user_id == user.id).all()
+    items = [schemas.CategoryRead.model_validate(row) for row in rows]
+    return json.dumps(jsonable_encoder(items)).encode("utf-8")
+
+
+def _time(db: Session, fn, repeat: int) -> float:
+    """Mean seconds per call; each call starts with an empty identity map, like a new request."""
+
+    fn()
+    total = 0.0
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.perf_counter()
+        fn()
+        total += time.perf_counter() - started
+    return total / repeat
+
+
+def run(rows: int, limit: int, repeat: int) -> dict:
+    with engine.connect() as conn:
+        outer = conn.begin()
+        try:
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            user = _seed(db, rows)
+            cases = {
+                "transactions_model": lambda: _model_transaction_page(db, user, limit),
+                "transactions_fast": lambda: service.list_transactions(db, user, limit=limit),
+                "transactions_fast_sparse": lambda: service.list_transactions(
+                    db, user, limit=limit, fields="id,amount,date"
+                ),
+                "categories_model": lambda: _model_categories(db, user),
+                "categories_fast": lambda: service.list_categories(db, user),
+            }
+            results = {name: _time(db, fn, repeat) for name, fn in cases.items()}
+        finally:
+            outer.rollback()
+    results["transactions_speedup"] = results["transactions_model"] / results["transactions_fast"]
+    results["categories_speedup"] = results["categories_model"] / results["categories_fast"]
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the list endpoints' response path.")
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.limit, args.repeat)
+    for name, value in results.items():
+        unit = "x" if name.endswith("speedup") else " ms"
+        print(f"{name}: {value if unit == 'x' else value * 1000:.2f}{unit}")
+    if results["transactions_speedup"] < args.min_speedup:
+        print(
+            f"Transaction page speedup {results['transactions_speedup']:.2f}x is below "
+            f"{args.min_speedup}x.",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 
 from app.database import Base
 
@@ -9,7 +21,12 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_user_category_name"),)
+    # Per-user change sequence of the last write; see `FinanceChangeCounter`.
+    change_seq = Column(BigInteger, nullable=False, server_default="0")
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_user_category_name"),
+        Index("ix_categories_user_change_seq", "user_id", "change_seq"),
+    )
 
 
 class Transaction(Base):
@@ -22,3 +39,80 @@ class Transaction(Base):
     amount = Column(Float, nullable=False)
     transaction_type = Column(String, nullable=False)
     date = Column(Date, nullable=False)
+    change_seq = Column(BigInteger, nullable=False, server_default="0")
+
+    # Every finance query filters on user_id first and pages/sorts by (date, id); these match the
+    # list (plain, by type, by category) and report (by type over a date range) query shapes so
+    # Postgres can use ordered index scans instead of bitmap scans plus sorts.
+    __table_args__ = (
+        Index("ix_transactions_user_date_id", user_id, date.desc(), id.desc()),
+        Index(
+            "ix_transactions_user_type_date",
+            user_id,
+            transaction_type,
+            date.desc(),
+            id.desc(),
+            postgresql_include=["amount", "category_id"],
+        ),
+        Index("ix_transactions_user_category_date", user_id, category_id, date.desc(), id.desc()),
+        Index("ix_transactions_user_change_seq", user_id, change_seq),
+        # The trigram index behind description search needs Postgres extensions and a concurrent
+        # build, so it is created by migration 5 rather than declared here.
+    )
+
+
+class FinanceChangeCounter(Base):
+    """
+    Last change sequence number handed out per user.
+
+    Writers bump it inside their own transaction, which row-locks it until commit, so a user's
+    sequence numbers become visible in commit order and `since=<seq>` never skips a write.
+    """
+
+    __tablename__ = "finance_change_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    seq = Column(BigInteger, nullable=False, server_default="0")
+    # Highest tombstone sequence compacted away; clients behind it must resync from scratch.
+    compacted_seq = Column(BigInteger, nullable=False, server_default="0")
+
+
+class FinanceTombstone(Base):
+    """A deleted transaction or category, kept for delta sync until the retention window ends."""
+
+    __tablename__ = "finance_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        Index("ix_finance_tombstones_user_change_seq", user_id, change_seq),
+        Index("ix_finance_tombstones_deleted_at", deleted_at),
+    )
+
+
+class DailyRollup(Base):
+    """Per-day totals maintained alongside every transaction write; reports read these."""
+
+    __tablename__ = "daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    transaction_type = Column(String, nullable=False)
+    total = Column(Float, nullable=False, server_default="0")
+    tx_count = Column(Integer, nullable=False, server_default="0")
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "day",
+            "category_id",
+            "transaction_type",
+            name="uq_daily_rollup_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
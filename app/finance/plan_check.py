@@ -0,0 +1,164 @@
+"""
+Query-plan regression check for the finance service.
+
+Seeds a throwaway dataset inside a transaction that is rolled back at the end, runs the read paths of
+`app.finance.service` while recording every SELECT they emit, and EXPLAINs each statement. Exits
+non-zero if any plan falls back to a sequential scan or adds an explicit sort node. Ranked search
+has to sort its matches, so for it only sequential scans count.
+
+    python -m app.finance.plan_check
+"""
+
+import sys
+from datetime import date, timedelta
+
+import orjson
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.database import engine
+from app.finance import rollups, service, sync
+from app.finance.models import Category, Transaction
+
+SEED_USERS = 200
+SEED_TRANSACTIONS_PER_USER = 250
+SEED_CATEGORIES_PER_USER = 10
+
+FORBIDDEN_NODES = {"Seq Scan", "Sort", "Incremental Sort"}
+RANKED_FORBIDDEN_NODES = {"Seq Scan"}
+
+
+def _seed(db: Session) -> User:
+    users = db.execute(
+        insert(User).returning(User.id),
+        [
+            {"email": f"plan-check-{i}@example.invalid", "hashed_password": "!"}
+            for i in range(SEED_USERS)
+        ],
+    ).scalars().all()
+    categories = db.execute(
+        insert(Category).returning(Category.id, Category.user_id),
+        [
+            {"user_id": user_id, "name": f"Category {i}"}
+            for user_id in users
+            for i in range(SEED_CATEGORIES_PER_USER)
+        ],
+    ).all()
+    categories_by_user: dict[int, list[int]] = {}
+    for category_id, user_id in categories:
+        categories_by_user.setdefault(user_id, []).append(category_id)
+
+    start = date(2020, 1, 1)
+    db.execute(
+        insert(Transaction),
+        [
+            {
+                "user_id": user_id,
+                "category_id": categories_by_user[user_id][i % SEED_CATEGORIES_PER_USER] if i % 7 else None,
+                "description": f"Seed transaction {i}",
+                "amount": float(1 + i % 97),
+                "transaction_type": "income" if i % 5 == 0 else "expense",
+                "date": start + timedelta(days=i % 1500),
+            }
+            for user_id in users
+            for i in range(SEED_TRANSACTIONS_PER_USER)
+        ],
+    )
+    rollups.rebuild(db)
+    db.execute(text("ANALYZE users"))
+    db.execute(text("ANALYZE categories"))
+    db.execute(text("ANALYZE transactions"))
+    db.execute(text("ANALYZE daily_rollups"))
+    return db.get(User, users[0])
+
+
+def _exercise(db: Session, user: User) -> None:
+    category_id = db.query(Category.id).filter(Category.user_id == user.id).first()[0]
+    start, end = date(2021, 1, 1), date(2021, 6, 30)
+
+    service.list_categories(db, user)
+    first_page = service.list_transactions(db, user)
+    service.list_transactions(db, user, cursor=orjson.loads(first_page)["next_cursor"])
+    service.list_transactions(db, user, start_date=start, end_date=end)
+    service.list_transactions(db, user, transaction_type="expense")
+    service.list_transactions(db, user, category_id=category_id)
+    sync.list_changes(db, user)
+    sync.list_changes(db, user, since=1)
+    service.get_summary(db, user)
+    service.get_summary(db, user, start_date=start, end_date=end)
+    service.get_category_breakdown(db, user)
+    service.get_category_breakdown(db, user, start_date=start, end_date=end)
+    service.get_dashboard(db, user, start_date=start, end_date=end)
+
+
+def _exercise_ranked(db: Session, user: User) -> None:
+    first_page = service.search_transactions(db, user, "transaction 12", limit=10)
+    service.search_transactions(
+        db, user, "transaction 12", limit=10, cursor=orjson.loads(first_page)["next_cursor"]
+    )
+    service.search_transactions(db, user, "trnsaction", transaction_type="expense")
+    service.search_transactions(db, user, "seed", start_date=date(2021, 1, 1))
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _offending_nodes(plan: dict, forbidden: set[str]) -> list[str]:
+    offenders = []
+    for node in _walk(plan):
+        if node["Node Type"] in forbidden:
+            relation = node.get("Relation Name")
+            offenders.append(f"{node['Node Type']} on {relation}" if relation else node["Node Type"])
+    return offenders
+
+
+def run() -> list[tuple[str, list[str]]]:
+    """Return `(statement, offending plan nodes)` for every regressed query."""
+
+    failures = []
+    with engine.connect() as conn:
+        outer = conn.begin()
+        statements: list[tuple[str, object, set[str]]] = []
+        forbidden = FORBIDDEN_NODES
+
+        def _record(_conn, _cursor, statement, parameters, _context, _executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters, forbidden))
+
+        try:
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            user = _seed(db)
+            event.listen(conn, "before_cursor_execute", _record)
+            try:
+                _exercise(db, user)
+                forbidden = RANKED_FORBIDDEN_NODES
+                _exercise_ranked(db, user)
+            finally:
+                event.remove(conn, "before_cursor_execute", _record)
+
+            for statement, parameters, forbidden_nodes in statements:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                offenders = _offending_nodes(plan[0]["Plan"], forbidden_nodes)
+                if offenders:
+                    failures.append((statement, offenders))
+        finally:
+            outer.rollback()
+    return failures
+
+
+def main() -> int:
+    failures = run()
+    for statement, offenders in failures:
+        print(f"REGRESSED: {', '.join(offenders)}\n{statement}\n", file=sys.stderr)
+    if failures:
+        return 1
+    print("All finance query plans use index scans without explicit sorts.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Daily report rollups.
+
+`daily_rollups` holds one row per `(user_id, day, category_id, transaction_type)` with the sum and
+count of the matching transactions. The service applies deltas in the same DB transaction as each
+transaction write, so reports can aggregate rollup rows instead of raw history.
+
+    python -m app.finance.rollups verify [--user-id ID]
+    python -m app.finance.rollups rebuild [--user-id ID]
+"""
+
+import argparse
+import sys
+from datetime import date
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, dialect_insert
+from app.finance.models import DailyRollup, Transaction
+
+RollupKey = tuple[int, date, int | None, str]
+Deltas = dict[RollupKey, list]
+
+# Serializes rebuilds (startup backfill vs. CLI) across processes.
+REBUILD_LOCK_ID = 0x526F6C6C
+AMOUNT_TOLERANCE = 1e-6
+
+
+def transaction_key(tx: Transaction) -> RollupKey:
+    return (tx.user_id, tx.date, tx.category_id, tx.transaction_type)
+
+
+def row_key(row: dict) -> RollupKey:
+    """`transaction_key` for plain column dicts used by the bulk write paths."""
+
+    return (row["user_id"], row["date"], row["category_id"], row["transaction_type"])
+
+
+def add_delta(deltas: Deltas, key: RollupKey, amount: float, count: int) -> None:
+    entry = deltas.setdefault(key, [0.0, 0])
+    entry[0] += amount
+    entry[1] += count
+
+
+def summary_delta(deltas: Deltas) -> dict:
+    """How `deltas` move the user's income, expense and balance totals."""
+
+    income = sum(amount for (_, _, _, kind), (amount, _) in deltas.items() if kind == "income")
+    expense = sum(amount for (_, _, _, kind), (amount, _) in deltas.items() if kind == "expense")
+    return {"income": income, "expense": expense, "balance": income - expense}
+
+
+def apply_deltas(db: Session, deltas: Deltas) -> None:
+    """Upsert `deltas` into `daily_rollups`. Does not commit; callers own the transaction."""
+
+    rows = [
+        {
+            "user_id": user_id,
+            "day": day,
+            "category_id": category_id,
+            "transaction_type": transaction_type,
+            "total": amount,
+            "tx_count": count,
+        }
+        for (user_id, day, category_id, transaction_type), (amount, count) in deltas.items()
+        if count or amount
+    ]
+    if not rows:
+        return
+    # A stable order keeps concurrent writers from deadlocking on each other's rollup rows.
+    rows.sort(key=lambda r: (r["user_id"], r["day"], r["category_id"] or 0, r["transaction_type"]))
+
+    stmt = dialect_insert(db)(DailyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "category_id", "transaction_type"],
+        set_={
+            "total": DailyRollup.total + stmt.excluded.total,
+            "tx_count": DailyRollup.tx_count + stmt.excluded.tx_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def _raw_aggregate(user_id: int | None):
+    query = select(
+        Transaction.user_id,
+        Transaction.date.label("day"),
+        Transaction.category_id,
+        Transaction.transaction_type,
+        func.sum(Transaction.amount).label("total"),
+        func.count().label("tx_count"),
+    ).group_by(
+        Transaction.user_id,
+        Transaction.date,
+        Transaction.category_id,
+        Transaction.transaction_type,
+    )
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    return query
+
+
+def _lock_for_rebuild(db: Session) -> None:
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(select(func.pg_advisory_xact_lock(REBUILD_LOCK_ID)))
+    # Hold off concurrent transaction writes so the snapshot and the rollups agree.
+    db.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+
+
+def rebuild(db: Session, user_id: int | None = None) -> None:
+    """Recompute rollups from raw transactions for one user, or everyone, and commit."""
+
+    _lock_for_rebuild(db)
+    cleanup = delete(DailyRollup)
+    if user_id is not None:
+        cleanup = cleanup.where(DailyRollup.user_id == user_id)
+    db.execute(cleanup)
+    db.execute(
+        insert(DailyRollup).from_select(
+            ["user_id", "day", "category_id", "transaction_type", "total", "tx_count"],
+            _raw_aggregate(user_id),
+        )
+    )
+    db.commit()
+
+
+def backfill_if_empty(db: Session) -> bool:
+    """Populate rollups for a database that predates them. Returns True if a rebuild ran."""
+
+    if db.query(DailyRollup.id).first() is not None:
+        return False
+    if db.query(Transaction.id).first() is None:
+        return False
+    _lock_for_rebuild(db)
+    # Another process may have finished the backfill while we waited for the lock.
+    if db.query(DailyRollup.id).first() is not None:
+        db.rollback()
+        return False
+    rebuild(db)
+    return True
+
+
+def verify(db: Session, user_id: int | None = None, limit: int = 100) -> list[dict]:
+    """Return up to `limit` rollup keys whose sum or count disagrees with the raw transactions."""
+
+    raw = _raw_aggregate(user_id).subquery()
+    rolled = select(
+        DailyRollup.user_id,
+        DailyRollup.day,
+        DailyRollup.category_id,
+        DailyRollup.transaction_type,
+        func.sum(DailyRollup.total).label("total"),
+        func.sum(DailyRollup.tx_count).label("tx_count"),
+    ).group_by(
+        DailyRollup.user_id,
+        DailyRollup.day,
+        DailyRollup.category_id,
+        DailyRollup.transaction_type,
+    )
+    if user_id is not None:
+        rolled = rolled.where(DailyRollup.user_id == user_id)
+    rolled = rolled.having(func.sum(DailyRollup.tx_count) != 0).subquery()
+
+    query = (
+        select(
+            func.coalesce(raw.c.user_id, rolled.c.user_id),
+            func.coalesce(raw.c.day, rolled.c.day),
+            func.coalesce(raw.c.category_id, rolled.c.category_id),
+            func.coalesce(raw.c.transaction_type, rolled.c.transaction_type),
+            raw.c.total,
+            raw.c.tx_count,
+            rolled.c.total,
+            rolled.c.tx_count,
+        )
+        .select_from(
+            raw.join(
+                rolled,
+                (raw.c.user_id == rolled.c.user_id)
+                & (raw.c.day == rolled.c.day)
+                & raw.c.category_id.is_not_distinct_from(rolled.c.category_id)
+                & (raw.c.transaction_type == rolled.c.transaction_type),
+                full=True,
+            )
+        )
+        .where(
+            raw.c.tx_count.is_(None)
+            | rolled.c.tx_count.is_(None)
+            | (raw.c.tx_count != rolled.c.tx_count)
+            | (func.abs(raw.c.total - rolled.c.total) > AMOUNT_TOLERANCE)
+        )
+        .limit(limit)
+    )
+    return [
+        {
+            "user_id": row[0],
+            "day": row[1],
+            "category_id": row[2],
+            "transaction_type": row[3],
+            "expected_total": row[4] or 0.0,
+            "expected_count": row[5] or 0,
+            "rollup_total": row[6] or 0.0,
+            "rollup_count": row[7] or 0,
+        }
+        for row in db.execute(query)
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild the daily report rollups.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild(db, args.user_id)
+            print("Rollups rebuilt.")
+            return 0
+
+        mismatches = verify(db, args.user_id)
+        for item in mismatches:
+            print(item, file=sys.stderr)
+        if mismatches:
+            print(f"{len(mismatches)} rollup key(s) disagree with raw transactions.", file=sys.stderr)
+            return 1
+        print("Rollups match raw transactions.")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,28 @@
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.finance import schemas, service
+from app.finance import schemas, service, sync
 from app.auth.models import User
-from app.auth.service import get_current_user
+from app.auth.service import get_current_user, get_streaming_user
+from app.core.events import event_broker
 from app.database import get_db
+from app.finance.dependencies import (
+    CATEGORY_SCOPES,
+    REPORT_SCOPES,
+    TRANSACTION_SCOPES,
+    get_read_db,
+    not_modified_guard,
+)
 
 router = APIRouter(prefix="/finance", tags=["finance"])
 
+# List routes return pre-encoded JSON; `response_model` only documents the full shape.
+FIELDS_DESCRIPTION = "Comma-separated subset of item fields to return, e.g. `id,amount,date`."
+
 
 @router.post("/categories", response_model=schemas.CategoryRead, status_code=status.HTTP_201_CREATED)
 def create_category(
@@ -22,10 +35,13 @@ def create_category(
 
 @router.get("/categories", response_model=list[schemas.CategoryRead])
 def list_categories(
-    db: Session = Depends(get_db),
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(not_modified_guard(CATEGORY_SCOPES)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    return service.list_categories(db, current_user)
+    content = service.list_categories(db, current_user, fields)
+    return Response(content, media_type="application/json", headers=cache_headers)
 
 
 @router.post("/transactions", response_model=schemas.TransactionRead, status_code=status.HTTP_201_CREATED)
@@ -37,22 +53,120 @@ def create_transaction(
     return service.create_transaction(db, current_user, payload)
 
 
-@router.get("/transactions", response_model=list[schemas.TransactionRead])
+@router.post("/transactions/import", response_model=schemas.TransactionImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return service.import_transactions_csv(db, current_user, file.file)
+
+
+@router.post("/transactions/batch", response_model=schemas.TransactionBatchResult)
+def apply_transaction_batch(
+    payload: schemas.TransactionBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return service.apply_transaction_batch(db, current_user, payload)
+
+
+@router.get("/transactions", response_model=schemas.TransactionPage)
 def list_transactions(
     start_date: date | None = None,
     end_date: date | None = None,
     category_id: int | None = None,
     transaction_type: str | None = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(not_modified_guard(TRANSACTION_SCOPES)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    return service.list_transactions(
+    page = service.list_transactions(
         db,
         current_user,
         start_date=start_date,
         end_date=end_date,
         category_id=category_id,
         transaction_type=transaction_type,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
+    return Response(page, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/transactions/search", response_model=schemas.TransactionPage)
+def search_transactions(
+    q: str = Query(min_length=service.SEARCH_MIN_LENGTH, max_length=200),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    cache_headers: dict = Depends(not_modified_guard(TRANSACTION_SCOPES)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    page = service.search_transactions(
+        db,
+        current_user,
+        q,
+        start_date=start_date,
+        end_date=end_date,
+        category_id=category_id,
+        transaction_type=transaction_type,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
+    return Response(page, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/changes", response_model=schemas.ChangeSet)
+def list_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    return Response(sync.list_changes(db, current_user, since, limit), media_type="application/json")
+
+
+@router.get("/events")
+async def change_events(current_user: User = Depends(get_streaming_user)):
+    # Server-sent events for this user's finance writes; see `app.core.events`.
+    return event_broker.stream_response(current_user.id)
+
+
+@router.get("/transactions/export")
+def export_transactions(
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    chunks = service.export_transactions(
+        db,
+        current_user,
+        export_format,
+        start_date=start_date,
+        end_date=end_date,
+        category_id=category_id,
+        transaction_type=transaction_type,
+    )
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'},
     )
 
 
@@ -78,20 +192,55 @@ def delete_transaction(
 
 @router.get("/reports/summary", response_model=schemas.FinanceSummary)
 def report_summary(
+    response: Response,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db),
+    cache_headers: dict = Depends(not_modified_guard(REPORT_SCOPES)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    response.headers.update(cache_headers)
     return service.get_summary(db, current_user, start_date=start_date, end_date=end_date)
 
 
 @router.get("/reports/category-breakdown", response_model=list[schemas.CategoryBreakdown])
 def report_category_breakdown(
+    response: Response,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db),
+    cache_headers: dict = Depends(not_modified_guard(REPORT_SCOPES)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    response.headers.update(cache_headers)
     return service.get_category_breakdown(db, current_user, start_date=start_date, end_date=end_date)
 
+
+@router.get("/reports/timeseries", response_model=schemas.CashflowTimeseries)
+def report_timeseries(
+    response: Response,
+    granularity: Literal["day", "week", "month"] = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(not_modified_guard(REPORT_SCOPES)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return service.get_cashflow_timeseries(
+        db, current_user, granularity=granularity, start_date=start_date, end_date=end_date
+    )
+
+
+@router.get("/reports/dashboard", response_model=schemas.DashboardReport)
+def report_dashboard(
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cache_headers: dict = Depends(not_modified_guard(REPORT_SCOPES)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    response.headers.update(cache_headers)
+    return service.get_dashboard(db, current_user, start_date=start_date, end_date=end_date)
+
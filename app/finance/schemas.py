@@ -1,12 +1,12 @@
 from datetime import date as DateType
 
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Literal
+from typing import Annotated, Literal
 
 
 class TransactionCreate(BaseModel):
     description: str = Field(..., min_length=1, example="Coffee")
-    amount: float = Field(..., gt=0, example=3.5)
+    amount: float = Field(..., gt=0, allow_inf_nan=False, example=3.5)
     transaction_type: Literal["income", "expense"]
     category_id: int | None = None
     date: DateType | None = None
@@ -14,7 +14,7 @@ class TransactionCreate(BaseModel):
 
 class TransactionUpdate(BaseModel):
     description: str | None = Field(default=None, min_length=1)
-    amount: float | None = Field(default=None, gt=0)
+    amount: float | None = Field(default=None, gt=0, allow_inf_nan=False)
     transaction_type: Literal["income", "expense"] | None = None
     category_id: int | None = None
     date: DateType | None = None
@@ -31,6 +31,66 @@ class TransactionRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TransactionPage(BaseModel):
+    items: list[TransactionRead]
+    # Opaque keyset cursor for the next page; None when this is the last page.
+    next_cursor: str | None = None
+
+
+class TransactionImportError(BaseModel):
+    row: int
+    error: str
+
+
+class TransactionImportResult(BaseModel):
+    imported: int
+    failed: int
+    # Capped; `failed` has the full count.
+    errors: list[TransactionImportError]
+
+
+class TransactionBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TransactionCreate
+
+
+class TransactionBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: TransactionUpdate
+
+
+class TransactionBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TransactionBatchOperation = Annotated[
+    TransactionBatchCreate | TransactionBatchUpdate | TransactionBatchDelete,
+    Field(discriminator="op"),
+]
+
+
+class TransactionBatchRequest(BaseModel):
+    operations: list[TransactionBatchOperation] = Field(..., min_length=1, max_length=1000)
+    # "atomic": any invalid operation rejects the whole batch.
+    # "best_effort": invalid operations are reported and skipped, the rest are applied.
+    mode: Literal["atomic", "best_effort"] = "atomic"
+
+
+class TransactionBatchItemResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: int | None = None
+    transaction: TransactionRead | None = None
+    error: str | None = None
+
+
+class TransactionBatchResult(BaseModel):
+    results: list[TransactionBatchItemResult]
+
+
 class CategoryCreate(BaseModel):
     name: str = Field(..., min_length=1)
 
@@ -42,6 +102,29 @@ class CategoryRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TransactionChange(TransactionRead):
+    change_seq: int
+
+
+class CategoryChange(CategoryRead):
+    change_seq: int
+
+
+class DeletedEntity(BaseModel):
+    entity: Literal["transaction", "category"]
+    id: int
+    change_seq: int
+
+
+class ChangeSet(BaseModel):
+    transactions: list[TransactionChange]
+    categories: list[CategoryChange]
+    deleted: list[DeletedEntity]
+    # Pass as `since` on the next call; keep calling while `has_more` is true.
+    next_since: int
+    has_more: bool
+
+
 class FinanceSummary(BaseModel):
     total_income: float
     total_expense: float
@@ -51,4 +134,25 @@ class FinanceSummary(BaseModel):
 class CategoryBreakdown(BaseModel):
     category: str
     spent: float
+    category_id: int | None = None
+
+
+class CashflowBucket(BaseModel):
+    bucket: DateType
+    income: float
+    expense: float
+    net: float
+    # Balance at the end of the bucket, including everything before the requested range.
+    balance: float
+
+
+class CashflowTimeseries(BaseModel):
+    granularity: Literal["day", "week", "month"]
+    opening_balance: float
+    buckets: list[CashflowBucket]
+
+
+class DashboardReport(BaseModel):
+    summary: FinanceSummary
+    category_breakdown: list[CategoryBreakdown]
 
@@ -1,52 +1,158 @@
-from datetime import date
+import base64
+import binascii
+import csv
+import io
+import json
+import math
+from collections.abc import Callable, Iterator
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import BinaryIO
 
+import orjson
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import (
+    Date,
+    Integer,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    update,
+)
 from sqlalchemy.orm import Session
 
 from app.auth.models import User
-from app.finance import schemas
-from app.finance.models import Category, Transaction
+from app.database import dialect_insert, is_replica
+from app.finance import rollups, schemas, sync
+from app.core.events import event_broker
+from app.core.replica import primary_stickiness
+from app.finance.cache import category_directory, report_cache
+from app.finance.models import Category, DailyRollup, Transaction
 
 
-def create_category(db: Session, current_user: User, payload: schemas.CategoryCreate) -> Category:
+def create_category(
+    db: Session, current_user: User, payload: schemas.CategoryCreate
+) -> schemas.CategoryRead:
     category_name = payload.name.strip()
     if not category_name:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category name is required")
 
-    exists = (
-        db.query(Category)
-        .filter(Category.user_id == current_user.id, Category.name == category_name)
-        .first()
-    )
-    if exists:
+    # One INSERT; `uq_user_category_name` decides whether the name is taken, which also holds
+    # for two concurrent requests creating the same category.
+    change_seq = sync.reserve_change_seqs(db, current_user.id)
+    category_id = db.execute(
+        dialect_insert(db)(Category)
+        .values(name=category_name, user_id=current_user.id, change_seq=change_seq)
+        .on_conflict_do_nothing(index_elements=["user_id", "name"])
+        .returning(Category.id)
+    ).scalar()
+    if category_id is None:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category already exists")
-
-    db_category = Category(name=category_name, user_id=current_user.id)
-    db.add(db_category)
     db.commit()
-    db.refresh(db_category)
-    return db_category
+    category = schemas.CategoryRead(id=category_id, name=category_name, user_id=current_user.id)
 
+    def after_commit() -> None:
+        category_directory.invalidate(current_user.id)
+        primary_stickiness.mark_write(current_user.id)
+        event_broker.publish(
+            current_user.id,
+            {"type": "category.created", "seq": change_seq, "category": category.model_dump()},
+        )
+
+    _after_commit(db, after_commit)
+    return category
+
+
+# Fields a list response can be narrowed to with `fields=`, in response order.
+CATEGORY_FIELDS = ("id", "name", "user_id")
+TRANSACTION_FIELDS = {
+    "id": Transaction.id,
+    "user_id": Transaction.user_id,
+    "description": Transaction.description,
+    "amount": Transaction.amount,
+    "transaction_type": Transaction.transaction_type,
+    "category_id": Transaction.category_id,
+    "date": Transaction.date,
+}
+
+
+def select_fields(fields: str | None, allowed) -> list[str]:
+    """Parse a `fields=id,amount` sparse fieldset; every allowed field when it is omitted."""
+
+    if not fields:
+        return list(allowed)
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(allowed)}",
+        )
+    return names
 
-def list_categories(db: Session, current_user: User) -> list[Category]:
-    return (
-        db.query(Category)
-        .filter(Category.user_id == current_user.id)
-        .order_by(Category.name.asc())
-        .all()
-    )
+
+def list_categories(db: Session, current_user: User, fields: str | None = None) -> bytes:
+    """The user's categories as an encoded JSON array, straight from the category directory."""
+
+    names = select_fields(fields, CATEGORY_FIELDS)
+    items = [
+        {"id": category_id, "name": name, "user_id": current_user.id}
+        for category_id, name in category_directory.get(db, current_user.id).items()
+    ]
+    if len(names) < len(CATEGORY_FIELDS):
+        items = [{name: item[name] for name in names} for item in items]
+    return orjson.dumps(items)
+
+
+# `Session.info` key: while it holds a list, post-commit side effects are queued there instead of
+# run, so the async service can run them on the threadpool (they make Redis and NOTIFY round
+# trips) rather than on the event loop thread that drives `run_sync`.
+DEFERRED_EFFECTS = "deferred_effects"
+
+
+def _after_commit(db: Session, effect: Callable[[], None]) -> None:
+    deferred = db.info.get(DEFERRED_EFFECTS)
+    if deferred is None:
+        effect()
+    else:
+        deferred.append(effect)
+
+
+def _after_write(db: Session, current_user: User, event: dict | None = None) -> None:
+    def effect() -> None:
+        # Runs after commit: bumping the version earlier could let a concurrent read cache
+        # pre-commit data under the new version.
+        report_cache.invalidate_user(current_user.id)
+        # Keep this user's reads on the primary until the replica has the write.
+        primary_stickiness.mark_write(current_user.id)
+        # Live dashboards: the change and how it moved the summary, so they needn't re-poll.
+        if event is not None:
+            event_broker.publish(current_user.id, event)
+
+    _after_commit(db, effect)
+
+
+def _transaction_event(event_type: str, db_tx: Transaction, deltas: rollups.Deltas) -> dict:
+    return {
+        "type": event_type,
+        "seq": db_tx.change_seq,
+        "transaction": schemas.TransactionRead.model_validate(db_tx).model_dump(mode="json"),
+        "summary_delta": rollups.summary_delta(deltas),
+    }
 
 
 def _validate_category_ownership(db: Session, current_user: User, category_id: int | None) -> None:
     if category_id is None:
         return
-    category = (
-        db.query(Category)
-        .filter(Category.id == category_id, Category.user_id == current_user.id)
-        .first()
-    )
-    if not category:
+    if category_id not in category_directory.lookup(db, current_user.id, [category_id]):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
 
@@ -64,13 +170,265 @@ def create_transaction(
         transaction_type=payload.transaction_type,
         category_id=payload.category_id,
         date=payload.date or date.today(),
+        change_seq=sync.reserve_change_seqs(db, current_user.id),
     )
     db.add(db_tx)
+    deltas: rollups.Deltas = {}
+    rollups.add_delta(deltas, rollups.transaction_key(db_tx), db_tx.amount, 1)
+    rollups.apply_deltas(db, deltas)
     db.commit()
     db.refresh(db_tx)
+    _after_write(db, current_user, _transaction_event("transaction.created", db_tx, deltas))
     return db_tx
 
 
+def _encode_cursor(tx_date: date, tx_id: int) -> str:
+    raw = f"{tx_date.isoformat()}:{tx_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        date_part, id_part = raw.split(":", 1)
+        return date.fromisoformat(date_part), int(id_part)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+
+
+def _encode_search_cursor(rank: int, tx_date: date, tx_id: int) -> str:
+    return _encode_cursor(tx_date, tx_id) + f".{rank}"
+
+
+def _decode_search_cursor(cursor: str) -> tuple[int, date, int]:
+    position, _, rank = cursor.rpartition(".")
+    try:
+        rank_value = int(rank)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+    return (rank_value, *_decode_cursor(position))
+
+
+IMPORT_CHUNK_SIZE = 10_000
+IMPORT_MAX_REPORTED_ERRORS = 1_000
+IMPORT_REQUIRED_COLUMNS = {"date", "description", "amount"}
+TRANSACTION_COPY_COLUMNS = (
+    "user_id",
+    "category_id",
+    "description",
+    "amount",
+    "transaction_type",
+    "date",
+    "change_seq",
+)
+
+
+def _parse_import_row(row: dict) -> tuple[str, float, str, date, str]:
+    """Return (description, amount, transaction_type, date, category name) or raise ValueError."""
+
+    description = (row.get("description") or "").strip()
+    if not description:
+        raise ValueError("description is required")
+    try:
+        amount = float((row.get("amount") or "").strip())
+    except ValueError:
+        raise ValueError("amount must be a number") from None
+    # float() also accepts "nan" and "inf", which would poison the rollup sums.
+    if not math.isfinite(amount):
+        raise ValueError("amount must be a number")
+    transaction_type = (row.get("transaction_type") or row.get("type") or "").strip().lower()
+    if not transaction_type:
+        # Bank exports usually sign the amount instead of labelling the direction.
+        transaction_type = "expense" if amount < 0 else "income"
+        amount = abs(amount)
+    if transaction_type not in ("income", "expense"):
+        raise ValueError("transaction_type must be income or expense")
+    if amount <= 0:
+        raise ValueError("amount must be greater than 0")
+    try:
+        tx_date = date.fromisoformat((row.get("date") or "").strip())
+    except ValueError:
+        raise ValueError("date must be YYYY-MM-DD") from None
+    return description, amount, transaction_type, tx_date, (row.get("category") or "").strip()
+
+
+def _resolve_category_ids(
+    db: Session, current_user: User, names: set[str], known: dict[str, int]
+) -> bool:
+    """
+    Fill `known` with ids for `names`, creating missing categories in one batch.
+
+    Returns True if categories were created, so the caller can invalidate the category directory
+    once its transaction has committed.
+    """
+
+    missing = [name for name in names if name not in known]
+    if not missing:
+        return False
+    lookup = select(Category.name, Category.id).where(
+        Category.user_id == current_user.id, Category.name.in_(missing)
+    )
+    known.update(db.execute(lookup).tuples().all())
+    to_create = [name for name in missing if name not in known]
+    if to_create:
+        first_seq = sync.reserve_change_seqs(db, current_user.id, len(to_create))
+        db.execute(
+            dialect_insert(db)(Category)
+            .values(
+                [
+                    {"user_id": current_user.id, "name": name, "change_seq": first_seq + offset}
+                    for offset, name in enumerate(to_create)
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "name"])
+        )
+        # Re-read instead of RETURNING so names created concurrently are picked up too.
+        known.update(db.execute(lookup).tuples().all())
+    return bool(to_create)
+
+
+def _bulk_insert_transactions(db: Session, rows: list[dict]) -> None:
+    """Insert plain transaction dicts without ORM objects: COPY on psycopg2, executemany otherwise."""
+
+    if not rows:
+        return
+    connection = db.connection()
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                ["" if row[column] is None else row[column] for column in TRANSACTION_COPY_COLUMNS]
+            )
+        buffer.seek(0)
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY transactions ({', '.join(TRANSACTION_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+        return
+    db.execute(insert(Transaction), rows)
+
+
+def import_transactions_csv(
+    db: Session,
+    current_user: User,
+    stream: BinaryIO,
+) -> schemas.TransactionImportResult:
+    """
+    Stream a CSV of transactions into the ledger.
+
+    Columns: `date` (YYYY-MM-DD), `description`, `amount`, optional `transaction_type` (a signed
+    amount is used when it is missing) and optional `category` (a name; created if new). Rows are
+    processed and committed in chunks, so memory stays constant for arbitrarily large files.
+    """
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    header = {name.strip().lower() for name in reader.fieldnames or []}
+    missing_columns = IMPORT_REQUIRED_COLUMNS - header
+    if missing_columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing CSV columns: {', '.join(sorted(missing_columns))}",
+        )
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    # Seeded from the category directory, so only names it doesn't know cost a query.
+    category_ids = {
+        name: category_id
+        for category_id, name in category_directory.get(db, current_user.id).items()
+    }
+    created_categories = False
+    errors: list[schemas.TransactionImportError] = []
+    imported = failed = 0
+    summary = {"income": 0.0, "expense": 0.0, "balance": 0.0}
+
+    def flush(parsed: list[tuple[int, tuple]]) -> None:
+        nonlocal imported, created_categories
+        names = {item[4] for _, item in parsed if item[4]}
+        created = _resolve_category_ids(db, current_user, names, category_ids)
+        rows = []
+        deltas: rollups.Deltas = {}
+        for _, (description, amount, transaction_type, tx_date, category_name) in parsed:
+            row = {
+                "user_id": current_user.id,
+                "category_id": category_ids[category_name] if category_name else None,
+                "description": description,
+                "amount": amount,
+                "transaction_type": transaction_type,
+                "date": tx_date,
+            }
+            rows.append(row)
+            rollups.add_delta(deltas, rollups.row_key(row), amount, 1)
+        first_seq = sync.reserve_change_seqs(db, current_user.id, len(rows))
+        for offset, row in enumerate(rows):
+            row["change_seq"] = first_seq + offset
+        _bulk_insert_transactions(db, rows)
+        rollups.apply_deltas(db, deltas)
+        db.commit()
+        created_categories = created_categories or created
+        imported += len(rows)
+        for key, value in rollups.summary_delta(deltas).items():
+            summary[key] += value
+
+    parsed: list[tuple[int, tuple]] = []
+    try:
+        # Line 1 is the header, so data rows start at 2.
+        for line_number, row in enumerate(reader, start=2):
+            try:
+                parsed.append((line_number, _parse_import_row(row)))
+            except ValueError as exc:
+                failed += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append(schemas.TransactionImportError(row=line_number, error=str(exc)))
+                continue
+            if len(parsed) >= IMPORT_CHUNK_SIZE:
+                flush(parsed)
+                parsed = []
+        if parsed:
+            flush(parsed)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse CSV after {imported} imported rows: {exc}",
+        ) from exc
+    finally:
+        if imported:
+            _after_write(
+                db,
+                current_user,
+                {"type": "transactions.imported", "count": imported, "summary_delta": summary},
+            )
+        if created_categories:
+            _after_commit(db, lambda: category_directory.invalidate(current_user.id))
+
+    return schemas.TransactionImportResult(imported=imported, failed=failed, errors=errors)
+
+
+def _transaction_filters(
+    current_user: User,
+    start_date: date | None,
+    end_date: date | None,
+    category_id: int | None,
+    transaction_type: str | None,
+) -> list:
+    criteria = [Transaction.user_id == current_user.id]
+    if start_date:
+        criteria.append(Transaction.date >= start_date)
+    if end_date:
+        criteria.append(Transaction.date <= end_date)
+    if category_id:
+        criteria.append(Transaction.category_id == category_id)
+    if transaction_type:
+        criteria.append(Transaction.transaction_type == transaction_type)
+    return criteria
+
+
 def list_transactions(
     db: Session,
     current_user: User,
@@ -78,69 +436,481 @@ def list_transactions(
     end_date: date | None = None,
     category_id: int | None = None,
     transaction_type: str | None = None,
-) -> list[Transaction]:
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-    if transaction_type:
-        query = query.filter(Transaction.transaction_type == transaction_type)
-    return query.order_by(Transaction.date.desc(), Transaction.id.desc()).all()
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: str | None = None,
+) -> bytes:
+    """
+    One page as encoded `TransactionPage` JSON.
 
+    Selects only the requested columns as plain tuples (no ORM objects, identity map or
+    pydantic models) and encodes them with orjson; this dominates the cost of large pages.
+    """
 
-def update_transaction(
+    names = select_fields(fields, TRANSACTION_FIELDS)
+    # The keyset columns ride along at the end of each row for the cursor, even when not requested.
+    columns = [TRANSACTION_FIELDS[name] for name in names]
+    query = select(*columns, Transaction.date, Transaction.id).where(
+        *_transaction_filters(current_user, start_date, end_date, category_id, transaction_type)
+    )
+    if cursor:
+        # Seek past the last row of the previous page instead of using OFFSET, so every page
+        # costs the same regardless of how deep into the history it is.
+        query = query.where(tuple_(Transaction.date, Transaction.id) < _decode_cursor(cursor))
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = db.execute(
+        query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][-2], rows[-1][-1])
+    return orjson.dumps(
+        {"items": [dict(zip(names, row)) for row in rows], "next_cursor": next_cursor}
+    )
+
+
+SEARCH_MIN_LENGTH = 3
+# Ranks are word similarities scaled to integers, so the keyset cursor compares them exactly.
+SEARCH_RANK_SCALE = 10_000
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_transactions(
     db: Session,
     current_user: User,
-    transaction_id: int,
-    payload: schemas.TransactionUpdate,
-) -> Transaction:
+    q: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: str | None = None,
+) -> bytes:
+    """
+    Transactions whose description contains or fuzzily matches `q`, best match first, as
+    encoded `TransactionPage` JSON.
+
+    On Postgres both predicates are answered by the `(user_id, description)` trigram index from
+    migration 5; only the matching rows are ranked, then paged by (rank, date, id) keyset.
+    """
+
+    term = q.strip()
+    if len(term) < SEARCH_MIN_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search term must be at least {SEARCH_MIN_LENGTH} characters",
+        )
+    names = select_fields(fields, TRANSACTION_FIELDS)
+    contains = Transaction.description.ilike(f"%{_escape_like(term)}%", escape="\\")
+    if db.get_bind().dialect.name == "postgresql":
+        # `description %> term`: some word of the description is similar to the term (typos).
+        match = or_(contains, Transaction.description.op("%>")(term))
+        rank = cast(func.word_similarity(term, Transaction.description) * SEARCH_RANK_SCALE, Integer)
+    else:
+        match, rank = contains, literal(0)
+
+    columns = [TRANSACTION_FIELDS[name] for name in names]
+    query = select(*columns, rank, Transaction.date, Transaction.id).where(
+        *_transaction_filters(current_user, start_date, end_date, category_id, transaction_type),
+        match,
+    )
+    if cursor:
+        query = query.where(
+            tuple_(rank, Transaction.date, Transaction.id) < _decode_search_cursor(cursor)
+        )
+    rows = db.execute(
+        query.order_by(rank.desc(), Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_search_cursor(*rows[-1][-3:])
+    return orjson.dumps(
+        {"items": [dict(zip(names, row)) for row in rows], "next_cursor": next_cursor}
+    )
+
+
+EXPORT_BATCH_SIZE = 2_000
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.transaction_type,
+    Transaction.category_id,
+)
+
+
+def export_transactions(
+    db: Session,
+    current_user: User,
+    export_format: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    category_id: int | None = None,
+    transaction_type: str | None = None,
+) -> Iterator[bytes]:
+    """
+    Return an iterator of encoded chunks for the filtered ledger, newest first.
+
+    The iterator runs after the request handler has returned, so it opens its own connection
+    rather than using `db`, and reads plain tuples from a server-side cursor in fixed-size
+    batches. Memory and time-to-first-byte don't depend on the size of the export.
+    """
+
+    statement = export_statement(current_user, start_date, end_date, category_id, transaction_type)
+    return _stream_export(db.get_bind(), statement, export_format)
+
+
+def export_statement(
+    current_user: User,
+    start_date: date | None,
+    end_date: date | None,
+    category_id: int | None,
+    transaction_type: str | None,
+):
+    return (
+        select(*EXPORT_COLUMNS)
+        .where(*_transaction_filters(current_user, start_date, end_date, category_id, transaction_type))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+    )
+
+
+def export_header(export_format: str) -> bytes:
+    if export_format != "csv":
+        return b""
+    header = io.StringIO()
+    csv.writer(header).writerow([column.key for column in EXPORT_COLUMNS])
+    return header.getvalue().encode("utf-8")
+
+
+def encode_export_batch(batch, export_format: str) -> bytes:
+    buffer = io.StringIO()
+    if export_format == "csv":
+        csv.writer(buffer).writerows(batch)
+    else:
+        names = [column.key for column in EXPORT_COLUMNS]
+        for row in batch:
+            record = dict(zip(names, row))
+            record["date"] = record["date"].isoformat()
+            buffer.write(json.dumps(record))
+            buffer.write("\n")
+    return buffer.getvalue().encode("utf-8")
+
+
+def _stream_export(bind, statement, export_format: str) -> Iterator[bytes]:
+    if export_format == "csv":
+        yield export_header(export_format)
+
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(
+            statement
+        )
+        for batch in result.partitions():
+            yield encode_export_batch(batch, export_format)
+
+
+def _lock_transaction(db: Session, current_user: User, transaction_id: int) -> Transaction:
+    """
+    The row, locked and freshly read: its current amount and key are what the rollup delta
+    subtracts, so a concurrent write to it must not slip in between.
+    """
+
     db_tx = (
         db.query(Transaction)
         .filter(Transaction.id == transaction_id, Transaction.user_id == current_user.id)
+        .with_for_update()
+        .populate_existing()
         .first()
     )
     if not db_tx:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+    return db_tx
+
 
+def update_transaction(
+    db: Session,
+    current_user: User,
+    transaction_id: int,
+    payload: schemas.TransactionUpdate,
+) -> Transaction:
     data = payload.model_dump(exclude_unset=True)
     if "category_id" in data:
         _validate_category_ownership(db, current_user, data["category_id"])
     if "description" in data and not data["description"].strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Description is required")
 
+    # The change counter is locked before the transaction and rollup rows, in every write path,
+    # so two writes by the same user can't deadlock on them.
+    change_seq = sync.reserve_change_seqs(db, current_user.id)
+    db_tx = _lock_transaction(db, current_user, transaction_id)
+    deltas: rollups.Deltas = {}
+    rollups.add_delta(deltas, rollups.transaction_key(db_tx), -db_tx.amount, -1)
     for key, value in data.items():
         if key == "description" and isinstance(value, str):
             setattr(db_tx, key, value.strip())
         else:
             setattr(db_tx, key, value)
+    rollups.add_delta(deltas, rollups.transaction_key(db_tx), db_tx.amount, 1)
+    rollups.apply_deltas(db, deltas)
+    db_tx.change_seq = change_seq
 
     db.commit()
     db.refresh(db_tx)
+    _after_write(db, current_user, _transaction_event("transaction.updated", db_tx, deltas))
     return db_tx
 
 
 def delete_transaction(db: Session, current_user: User, transaction_id: int) -> None:
-    db_tx = (
-        db.query(Transaction)
-        .filter(Transaction.id == transaction_id, Transaction.user_id == current_user.id)
-        .first()
-    )
-    if not db_tx:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+    change_seq = sync.reserve_change_seqs(db, current_user.id)
+    db_tx = _lock_transaction(db, current_user, transaction_id)
+    deltas: rollups.Deltas = {}
+    rollups.add_delta(deltas, rollups.transaction_key(db_tx), -db_tx.amount, -1)
+    rollups.apply_deltas(db, deltas)
+    sync.add_tombstones(db, current_user.id, "transaction", [db_tx.id], change_seq)
     db.delete(db_tx)
     db.commit()
+    _after_write(
+        db,
+        current_user,
+        {
+            "type": "transaction.deleted",
+            "seq": change_seq,
+            "transaction": {"id": transaction_id},
+            "summary_delta": rollups.summary_delta(deltas),
+        },
+    )
+
+
+BATCH_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.category_id,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.transaction_type,
+    Transaction.date,
+)
+NON_NULLABLE_UPDATE_FIELDS = ("description", "amount", "transaction_type", "date")
+
+
+def apply_transaction_batch(
+    db: Session,
+    current_user: User,
+    payload: schemas.TransactionBatchRequest,
+) -> schemas.TransactionBatchResult:
+    """
+    Apply a mixed list of create/update/delete operations in one DB transaction.
+
+    Operations are validated in order against an in-memory snapshot of the referenced rows (the
+    cached category directory and one locking query for target transactions), then written with a
+    single bulk INSERT, a bulk UPDATE by primary key and a single DELETE.
+    """
+
+    operations = payload.operations
+    category_ids = {
+        op.data.category_id
+        for op in operations
+        if op.op in ("create", "update") and op.data.category_id is not None
+    }
+    owned_categories = set()
+    if category_ids:
+        owned_categories = set(category_directory.lookup(db, current_user.id, category_ids))
+
+    target_ids = {op.id for op in operations if op.op in ("update", "delete")}
+    originals: dict[int, dict] = {}
+    if target_ids:
+        # Deltas and the full-row UPDATE below are computed from these rows, so lock them until
+        # commit. Counter first (reserving nothing yet), then rows in id order, as in every write.
+        sync.reserve_change_seqs(db, current_user.id, 0)
+        rows = db.execute(
+            select(*BATCH_COLUMNS)
+            .where(Transaction.user_id == current_user.id, Transaction.id.in_(target_ids))
+            .order_by(Transaction.id)
+            .with_for_update()
+        ).mappings()
+        originals = {row["id"]: dict(row) for row in rows}
+    state = {tx_id: dict(row) for tx_id, row in originals.items()}
+
+    results: list[schemas.TransactionBatchItemResult] = []
+    creates: list[tuple[int, dict]] = []
+    updated_ids: set[int] = set()
+    deleted_ids: set[int] = set()
+
+    for index, op in enumerate(operations):
+        result = schemas.TransactionBatchItemResult(index=index, op=op.op, ok=False)
+        results.append(result)
+        if op.op == "create":
+            data = op.data
+            if data.category_id is not None and data.category_id not in owned_categories:
+                result.error = "Category not found"
+                continue
+            row = {
+                "user_id": current_user.id,
+                "category_id": data.category_id,
+                "description": data.description.strip(),
+                "amount": data.amount,
+                "transaction_type": data.transaction_type,
+                "date": data.date or date.today(),
+            }
+            creates.append((index, row))
+            result.ok = True
+            continue
+
+        current = state.get(op.id)
+        result.id = op.id
+        if current is None:
+            result.error = "Transaction not found"
+            continue
+
+        if op.op == "delete":
+            del state[op.id]
+            updated_ids.discard(op.id)
+            deleted_ids.add(op.id)
+            result.ok = True
+            continue
+
+        data = op.data.model_dump(exclude_unset=True)
+        if data.get("category_id") is not None and data["category_id"] not in owned_categories:
+            result.error = "Category not found"
+            continue
+        if any(key in data and data[key] is None for key in NON_NULLABLE_UPDATE_FIELDS):
+            result.error = "Only category_id can be cleared"
+            continue
+        if "description" in data:
+            data["description"] = data["description"].strip()
+            if not data["description"]:
+                result.error = "Description is required"
+                continue
+        current.update(data)
+        updated_ids.add(op.id)
+        result.ok = True
+        result.transaction = schemas.TransactionRead.model_validate(current)
+
+    errors = [{"index": item.index, "msg": item.error} for item in results if not item.ok]
+    if errors and payload.mode == "atomic":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
+    deltas: rollups.Deltas = {}
+    for tx_id in updated_ids | deleted_ids:
+        rollups.add_delta(deltas, rollups.row_key(originals[tx_id]), -originals[tx_id]["amount"], -1)
+    for tx_id in updated_ids:
+        rollups.add_delta(deltas, rollups.row_key(state[tx_id]), state[tx_id]["amount"], 1)
+    for _, row in creates:
+        rollups.add_delta(deltas, rollups.row_key(row), row["amount"], 1)
+
+    changed = len(creates) + len(updated_ids) + len(deleted_ids)
+    next_seq = sync.reserve_change_seqs(db, current_user.id, changed) if changed else 0
+    for _, row in creates:
+        row["change_seq"] = next_seq
+        next_seq += 1
+    for tx_id in sorted(updated_ids):
+        state[tx_id]["change_seq"] = next_seq
+        next_seq += 1
+    if deleted_ids:
+        sync.add_tombstones(db, current_user.id, "transaction", deleted_ids, next_seq)
+
+    if creates:
+        new_ids = db.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            [row for _, row in creates],
+        ).scalars().all()
+        for (index, row), tx_id in zip(creates, new_ids):
+            results[index].id = tx_id
+            results[index].transaction = schemas.TransactionRead.model_validate({**row, "id": tx_id})
+    if updated_ids:
+        db.execute(update(Transaction), [state[tx_id] for tx_id in sorted(updated_ids)])
+    if deleted_ids:
+        db.execute(
+            delete(Transaction).where(
+                Transaction.user_id == current_user.id, Transaction.id.in_(deleted_ids)
+            )
+        )
+    rollups.apply_deltas(db, deltas)
+    db.commit()
+    if changed:
+        _after_write(
+            db,
+            current_user,
+            {
+                "type": "transactions.batch",
+                # The batch used every number up to this one; fetch them with /finance/changes.
+                "seq": next_seq + len(deleted_ids) - 1,
+                "created": len(creates),
+                "updated": len(updated_ids),
+                "deleted": len(deleted_ids),
+                "summary_delta": rollups.summary_delta(deltas),
+            },
+        )
+    return schemas.TransactionBatchResult(results=results)
+
 
+def _aggregate_by_category(
+    db: Session,
+    current_user: User,
+    start_date: date | None,
+    end_date: date | None,
+):
+    """
+    Income and expense totals per category in a single round trip.
 
-def _base_query(db: Session, current_user: User, start_date: date | None, end_date: date | None):
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    Reads the daily rollups rather than raw transactions, so the cost follows the number of
+    active days in the range instead of the number of transactions. Both the summary and the
+    category breakdown are derived from these rows; names come from the category directory.
+    """
+
+    is_income = DailyRollup.transaction_type == "income"
+    is_expense = DailyRollup.transaction_type == "expense"
+    query = db.query(
+        DailyRollup.category_id,
+        func.coalesce(func.sum(case((is_income, DailyRollup.total), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((is_expense, DailyRollup.total), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((is_expense, DailyRollup.tx_count), else_=0)), 0),
+    ).filter(DailyRollup.user_id == current_user.id)
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        query = query.filter(DailyRollup.day >= start_date)
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    return query
+        query = query.filter(DailyRollup.day <= end_date)
+    return query.group_by(DailyRollup.category_id).all()
+
+
+def _summary_from_rows(rows) -> schemas.FinanceSummary:
+    income = sum(float(row[1] or 0.0) for row in rows)
+    expense = sum(float(row[2] or 0.0) for row in rows)
+    return schemas.FinanceSummary(
+        total_income=income,
+        total_expense=expense,
+        balance=income - expense,
+    )
+
+
+def _breakdown_from_rows(
+    db: Session, current_user: User, rows
+) -> list[schemas.CategoryBreakdown]:
+    rows = [row for row in rows if row[3]]
+    names = category_directory.lookup(
+        db, current_user.id, [row[0] for row in rows if row[0] is not None]
+    )
+    breakdown = []
+    for category_id, _income, spent, _expense_count in rows:
+        breakdown.append(
+            schemas.CategoryBreakdown(
+                category=names.get(category_id, "Uncategorized"),
+                spent=float(spent or 0.0),
+                category_id=category_id,
+            )
+        )
+    return breakdown
+
+
+def _report_params(start_date: date | None, end_date: date | None) -> dict:
+    return {"start_date": start_date, "end_date": end_date}
 
 
 def get_summary(
@@ -149,22 +919,16 @@ def get_summary(
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> schemas.FinanceSummary:
-    base_query = _base_query(db, current_user, start_date, end_date)
-    income = (
-        base_query.filter(Transaction.transaction_type == "income")
-        .with_entities(func.coalesce(func.sum(Transaction.amount), 0.0))
-        .scalar()
-    )
-    expense = (
-        base_query.filter(Transaction.transaction_type == "expense")
-        .with_entities(func.coalesce(func.sum(Transaction.amount), 0.0))
-        .scalar()
-    )
-    return schemas.FinanceSummary(
-        total_income=float(income or 0.0),
-        total_expense=float(expense or 0.0),
-        balance=float((income or 0.0) - (expense or 0.0)),
+    data = report_cache.get_or_compute(
+        current_user.id,
+        "summary",
+        _report_params(start_date, end_date),
+        lambda: _summary_from_rows(
+            _aggregate_by_category(db, current_user, start_date, end_date)
+        ).model_dump(),
+        store=not is_replica(db),
     )
+    return schemas.FinanceSummary.model_validate(data)
 
 
 def get_category_breakdown(
@@ -173,30 +937,153 @@ def get_category_breakdown(
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> list[schemas.CategoryBreakdown]:
-    query = _base_query(db, current_user, start_date, end_date).filter(
-        Transaction.transaction_type == "expense"
+    data = report_cache.get_or_compute(
+        current_user.id,
+        "category-breakdown",
+        _report_params(start_date, end_date),
+        lambda: [
+            item.model_dump()
+            for item in _breakdown_from_rows(
+                db, current_user, _aggregate_by_category(db, current_user, start_date, end_date)
+            )
+        ],
+        store=not is_replica(db),
     )
-    rows = (
-        query.with_entities(Transaction.category_id, func.sum(Transaction.amount))
-        .group_by(Transaction.category_id)
-        .all()
+    return [schemas.CategoryBreakdown.model_validate(item) for item in data]
+
+
+def get_dashboard(
+    db: Session,
+    current_user: User,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> schemas.DashboardReport:
+    def compute():
+        rows = _aggregate_by_category(db, current_user, start_date, end_date)
+        return schemas.DashboardReport(
+            summary=_summary_from_rows(rows),
+            category_breakdown=_breakdown_from_rows(db, current_user, rows),
+        ).model_dump()
+
+    data = report_cache.get_or_compute(
+        current_user.id,
+        "dashboard",
+        _report_params(start_date, end_date),
+        compute,
+        store=not is_replica(db),
     )
-    if not rows:
-        return []
+    return schemas.DashboardReport.model_validate(data)
 
-    category_ids = [row[0] for row in rows if row[0] is not None]
-    category_map = {}
-    if category_ids:
-        category_items = (
-            db.query(Category)
-            .filter(Category.id.in_(category_ids), Category.user_id == current_user.id)
-            .all()
+
+TIMESERIES_MAX_BUCKETS = 5_000
+
+
+def _truncate(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(bucket: date, granularity: str) -> date:
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if granularity == "month":
+        return date(bucket.year + bucket.month // 12, bucket.month % 12 + 1, 1)
+    return bucket + timedelta(days=1)
+
+
+def _day_bucket(db: Session, granularity: str):
+    """First day of each rollup row's bucket, like `_truncate` but in SQL."""
+
+    if db.get_bind().dialect.name != "sqlite":
+        return cast(func.date_trunc(granularity, DailyRollup.day), Date)
+    # SQLite (local development) has no date_trunc; its date() modifiers do the same.
+    if granularity == "week":
+        # On or after the day to a Sunday, then back to that week's Monday.
+        return type_coerce(func.date(DailyRollup.day, "weekday 0", "-6 days"), Date)
+    if granularity == "month":
+        return type_coerce(func.date(DailyRollup.day, "start of month"), Date)
+    return DailyRollup.day
+
+
+def _cashflow_timeseries(
+    db: Session,
+    current_user: User,
+    granularity: str,
+    start_date: date | None,
+    end_date: date | None,
+) -> schemas.CashflowTimeseries:
+    # Rollup rows before the range land in a NULL bucket, which yields the opening balance
+    # from the same query.
+    bucket = _day_bucket(db, granularity)
+    if start_date:
+        bucket = case((DailyRollup.day < start_date, None), else_=bucket)
+    bucket = bucket.label("bucket")
+    is_income = DailyRollup.transaction_type == "income"
+    is_expense = DailyRollup.transaction_type == "expense"
+    query = (
+        db.query(
+            bucket,
+            func.coalesce(func.sum(case((is_income, DailyRollup.total), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((is_expense, DailyRollup.total), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((is_income, DailyRollup.total), else_=-DailyRollup.total)), 0.0),
         )
-        category_map = {item.id: item.name for item in category_items}
+        .filter(DailyRollup.user_id == current_user.id)
+        .group_by(bucket)
+    )
+    if end_date:
+        query = query.filter(DailyRollup.day <= end_date)
 
-    breakdown = []
-    for category_id, spent in rows:
-        label = category_map.get(category_id, "Uncategorized")
-        breakdown.append(schemas.CategoryBreakdown(category=label, spent=float(spent or 0.0)))
-    return breakdown
+    opening_balance = 0.0
+    totals: dict[date, tuple[float, float]] = {}
+    for bucket_start, income, expense, net in query.all():
+        if bucket_start is None:
+            opening_balance = float(net)
+        else:
+            totals[bucket_start] = (float(income), float(expense))
+
+    first = _truncate(start_date, granularity) if start_date else min(totals, default=None)
+    last = _truncate(end_date, granularity) if end_date else max(totals, default=None)
+    keys: list[date] = []
+    if first is not None and last is not None:
+        current = first
+        while current <= last:
+            keys.append(current)
+            if len(keys) > TIMESERIES_MAX_BUCKETS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Date range has too many buckets for this granularity",
+                )
+            current = _next_bucket(current, granularity)
+
+    incomes = [totals.get(key, (0.0, 0.0))[0] for key in keys]
+    expenses = [totals.get(key, (0.0, 0.0))[1] for key in keys]
+    nets = list(map(float.__sub__, incomes, expenses))
+    balances = list(accumulate(nets, initial=opening_balance))[1:]
+    return schemas.CashflowTimeseries(
+        granularity=granularity,
+        opening_balance=opening_balance,
+        buckets=[
+            schemas.CashflowBucket(bucket=key, income=income, expense=expense, net=net, balance=balance)
+            for key, income, expense, net, balance in zip(keys, incomes, expenses, nets, balances)
+        ],
+    )
 
+
+def get_cashflow_timeseries(
+    db: Session,
+    current_user: User,
+    granularity: str = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> schemas.CashflowTimeseries:
+    data = report_cache.get_or_compute(
+        current_user.id,
+        "timeseries",
+        {"granularity": granularity, **_report_params(start_date, end_date)},
+        lambda: _cashflow_timeseries(db, current_user, granularity, start_date, end_date).model_dump(),
+        store=not is_replica(db),
+    )
+    return schemas.CashflowTimeseries.model_validate(data)
@@ -0,0 +1,270 @@
+"""
+Delta sync for offline clients.
+
+Every transaction and category write takes sequence numbers from the user's change counter and
+stamps them on the rows it writes (`change_seq`); deletes leave a tombstone carrying theirs.
+`GET /finance/changes?since=<seq>` reads only rows above the client's last seen number through
+the `(user_id, change_seq)` indexes, so sync cost follows the change rate, not the ledger size.
+
+Tombstones older than `SYNC_TOMBSTONE_RETENTION_DAYS` are compacted in short batches. A client
+whose `since` is behind the compacted horizon gets a 410 and resyncs from `since=0`.
+
+    python -m app.finance.sync compact [--batch-size N]
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    bindparam,
+    case,
+    cast,
+    delete,
+    insert,
+    literal,
+    null,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.core.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.finance.models import Category, FinanceChangeCounter, FinanceTombstone, Transaction
+
+logger = logging.getLogger(__name__)
+
+CHANGE_TRANSACTION_COLUMNS = {
+    "id": Transaction.id,
+    "user_id": Transaction.user_id,
+    "description": Transaction.description,
+    "amount": Transaction.amount,
+    "transaction_type": Transaction.transaction_type,
+    "category_id": Transaction.category_id,
+    "date": Transaction.date,
+}
+CHANGE_CATEGORY_COLUMNS = {"id": Category.id, "name": Category.name, "user_id": Category.user_id}
+CHANGE_TOMBSTONE_COLUMNS = {"id": FinanceTombstone.entity_id, "entity": FinanceTombstone.entity}
+# The union of the three shapes; each stream leaves the columns it lacks NULL.
+CHANGE_COLUMNS = {
+    **CHANGE_TRANSACTION_COLUMNS,
+    **CHANGE_CATEGORY_COLUMNS,
+    **CHANGE_TOMBSTONE_COLUMNS,
+}
+CHANGE_LISTS = {"transaction": "transactions", "category": "categories"}
+CHANGE_ITEM_COLUMNS = {
+    "transaction": CHANGE_TRANSACTION_COLUMNS,
+    "category": CHANGE_CATEGORY_COLUMNS,
+}
+
+
+def reserve_change_seqs(db: Session, user_id: int, count: int = 1) -> int:
+    """
+    Reserve `count` consecutive sequence numbers for the caller's transaction; returns the first.
+
+    The counter row stays locked until that transaction ends, which serializes the user's writes
+    and makes their numbers visible in order.
+    """
+
+    counter = FinanceChangeCounter.__table__
+    last = db.execute(
+        dialect_insert(db)(counter)
+        .values(user_id=user_id, seq=count)
+        .on_conflict_do_update(index_elements=["user_id"], set_={"seq": counter.c.seq + count})
+        .returning(counter.c.seq)
+    ).scalar_one()
+    return last - count + 1
+
+
+def add_tombstones(db: Session, user_id: int, entity: str, entity_ids, first_seq: int) -> None:
+    """Record deletes of `entity_ids`, numbered from `first_seq` in id order."""
+
+    db.execute(
+        insert(FinanceTombstone),
+        [
+            {
+                "user_id": user_id,
+                "entity": entity,
+                "entity_id": entity_id,
+                "change_seq": first_seq + offset,
+            }
+            for offset, entity_id in enumerate(sorted(entity_ids))
+        ],
+    )
+
+
+def list_changes(db: Session, current_user: User, since: int = 0, limit: int = 500) -> bytes:
+    """
+    Encoded `ChangeSet` JSON with up to `limit` changes above `since`, oldest first.
+
+    `since=0` returns every live row and no tombstones: a fresh client has nothing to delete.
+    """
+
+    def stream(kind: str, model, columns: dict):
+        selected = [literal(kind).label("kind")]
+        for name, column in CHANGE_COLUMNS.items():
+            value = columns.get(name)
+            selected.append((value if value is not None else cast(null(), column.type)).label(name))
+        return select(
+            select(*selected, model.change_seq)
+            .where(model.user_id == current_user.id, model.change_seq > since)
+            .order_by(model.change_seq)
+            .limit(limit + 1)
+            .subquery()
+        )
+
+    streams = [
+        stream("transaction", Transaction, CHANGE_TRANSACTION_COLUMNS),
+        stream("category", Category, CHANGE_CATEGORY_COLUMNS),
+    ]
+    if since:
+        streams.append(stream("deleted", FinanceTombstone, CHANGE_TOMBSTONE_COLUMNS))
+    # One statement, so all streams come from one snapshot: with separate statements a write
+    # committing in between could be missed by one stream while a later number from another
+    # moved `next_since` past it.
+    changes = db.execute(union_all(*streams)).all()
+
+    # Checked after reading, so a compaction that raced the read above is still caught.
+    compacted_seq = db.execute(
+        select(FinanceChangeCounter.compacted_seq).where(
+            FinanceChangeCounter.user_id == current_user.id
+        )
+    ).scalar()
+    if since and compacted_seq and since < compacted_seq:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Deletions up to sequence {compacted_seq} were compacted; resync with since=0",
+        )
+
+    # Each stream is already capped at limit + 1, so the first `limit` of the merge are exact.
+    changes.sort(key=lambda change: change.change_seq)
+    has_more = len(changes) > limit
+    if has_more:
+        last_seq = changes[limit - 1].change_seq
+        # Rows from before sync existed can share a number across tables; never split those.
+        changes = [change for change in changes if change.change_seq <= last_seq]
+
+    body = {"transactions": [], "categories": [], "deleted": [], "has_more": has_more}
+    for row in changes:
+        if row.kind == "deleted":
+            body["deleted"].append(
+                {"entity": row.entity, "id": row.id, "change_seq": row.change_seq}
+            )
+        else:
+            item = {name: getattr(row, name) for name in CHANGE_ITEM_COLUMNS[row.kind]}
+            item["change_seq"] = row.change_seq
+            body[CHANGE_LISTS[row.kind]].append(item)
+    body["next_since"] = changes[-1].change_seq if changes else since
+    return orjson.dumps(body)
+
+
+def compact_batch(db: Session, batch_size: int) -> int:
+    """Delete up to `batch_size` expired tombstones and commit. Returns the number deleted."""
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.sync_tombstone_retention_days)
+    rows = db.execute(
+        select(FinanceTombstone.id, FinanceTombstone.user_id, FinanceTombstone.change_seq)
+        .where(FinanceTombstone.deleted_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        horizons: dict[int, int] = {}
+        for row in rows:
+            horizons[row.user_id] = max(horizons.get(row.user_id, 0), row.change_seq)
+        db.execute(delete(FinanceTombstone).where(FinanceTombstone.id.in_([row.id for row in rows])))
+        # Raise each user's horizon, never lower it; users in id order to avoid lock cycles.
+        counter = FinanceChangeCounter.__table__
+        horizon = bindparam("horizon")
+        db.execute(
+            update(counter)
+            .where(counter.c.user_id == bindparam("counter_user_id"))
+            .values(
+                compacted_seq=case(
+                    (counter.c.compacted_seq < horizon, horizon), else_=counter.c.compacted_seq
+                )
+            ),
+            [
+                {"counter_user_id": user_id, "horizon": horizons[user_id]}
+                for user_id in sorted(horizons)
+            ],
+        )
+    db.commit()
+    return len(rows)
+
+
+def compact(db: Session, batch_size: int | None = None, pause_seconds: float = 0.0) -> int:
+    """Compact batches until none are left. Returns the total number of tombstones deleted."""
+
+    batch_size = batch_size or settings.sync_compaction_batch_size
+    total = 0
+    while True:
+        deleted = compact_batch(db, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+class TombstoneCompactor:
+    """Runs `compact()` every `SYNC_COMPACTION_INTERVAL_SECONDS` on a daemon thread."""
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self.session_factory = session_factory
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.runs = 0
+        self.deleted = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="tombstone-compaction", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(settings.sync_compaction_interval_seconds):
+            try:
+                with self.session_factory() as db:
+                    self.deleted += compact(db, pause_seconds=0.05)
+                self.runs += 1
+            except Exception:
+                logger.exception("Tombstone compaction failed; retrying at the next interval")
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "deleted": self.deleted}
+
+
+tombstone_compactor = TombstoneCompactor()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compact delta-sync tombstones.")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        deleted = compact(db, args.batch_size, pause_seconds=0.05)
+    print(f"Deleted {deleted} tombstone(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
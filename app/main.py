@@ -1,11 +1,31 @@
-from fastapi import FastAPI
+import secrets
+
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import migrations
+from app.ai_agent import async_router as ai_async_router
+from app.ai_agent import router as ai_sync_router
+from app.ai_agent.categorizer import categorizer
+from app.auth import async_router as auth_async_router
 from app.auth import models as auth_models
-from app.auth.router import router as auth_router
-from app.database import Base, engine, ensure_schema
+from app.auth import router as auth_sync_router
+from app.core.config import settings
+from app.auth.cache import principal_cache, token_cache
+from app.auth.hasher import password_hasher
+from app.auth.otp_purge import otp_purger
+from app.auth.outbox import email_sender
+from app.core.db_pool import pool_stats
+from app.core.events import event_broker
+from app.core.rate_limit import rate_limiter
+from app.core.replica import replica_health
+from app.database import async_engine, async_replica_engine, engine, replica_engine
+from app.finance import async_router as finance_async_router
 from app.finance import models as finance_models
-from app.finance.router import router as finance_router
+from app.finance import router as finance_sync_router
+from app.finance.cache import report_cache
+from app.finance.sync import tombstone_compactor
 
 app = FastAPI(title="Finance AI Monolith")
 
@@ -20,22 +40,95 @@ app.add_middleware(
 )
 
 
-@app.get("/health")
-def healthcheck():
-    return {"status": "ok"}
+@app.get("/health")
+def healthcheck():
+    return {"status": "ok"}
+
+
+_metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_metrics_bearer),
+) -> None:
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+def metrics():
+    db_pools = {"sync": pool_stats(engine)}
+    if async_engine is not None:
+        db_pools["async"] = pool_stats(async_engine.sync_engine)
+    if replica_engine is not None:
+        db_pools["replica"] = pool_stats(replica_engine)
+        db_pools["replica_fallbacks"] = replica_health.fallbacks
+    if async_replica_engine is not None:
+        db_pools["async_replica"] = pool_stats(async_replica_engine.sync_engine)
+    return {
+        "report_cache": report_cache.stats(),
+        "db_pool": db_pools,
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "email_outbox": email_sender.stats(),
+        "otp_purge": otp_purger.stats(),
+        "tombstone_compaction": tombstone_compactor.stats(),
+        "events": event_broker.stats(),
+        "categorizer": categorizer.stats(),
+    }
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    ensure_schema()
+    migrations.check()
+    if settings.email_sender_enabled:
+        email_sender.start()
+    if settings.otp_purge_enabled:
+        otp_purger.start()
+    if settings.sync_compaction_enabled:
+        tombstone_compactor.start()
+    event_broker.start()
     _ = (
         auth_models.User,
         auth_models.EmailOTP,
+        auth_models.EmailOutbox,
         finance_models.Category,
         finance_models.Transaction,
+        finance_models.DailyRollup,
+        finance_models.FinanceChangeCounter,
+        finance_models.FinanceTombstone,
     )
 
 
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    password_hasher.shutdown()
+    if settings.email_sender_enabled:
+        email_sender.stop()
+    if settings.otp_purge_enabled:
+        otp_purger.stop()
+    if settings.sync_compaction_enabled:
+        tombstone_compactor.stop()
+    event_broker.stop()
+
+
+# Both stacks expose the same API; DB_ASYNC picks one so they can be benchmarked side by side.
+if settings.db_async:
+    auth_router, finance_router = auth_async_router.router, finance_async_router.router
+    ai_router = ai_async_router.router
+else:
+    auth_router, finance_router = auth_sync_router.router, finance_sync_router.router
+    ai_router = ai_sync_router.router
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(finance_router, prefix="/api/v1")
+app.include_router(ai_router, prefix="/api/v1")
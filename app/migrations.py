@@ -0,0 +1,465 @@
+"""
+Versioned schema migrations.
+
+`MIGRATIONS` is applied in order and each version is recorded in `schema_migrations` in the same
+transaction as its changes. `migrate()` holds a Postgres advisory lock, so when many workers boot
+at once exactly one migrates and the others wait, re-read the version and find nothing to do.
+Waiters poll for the lock from an autocommit connection rather than blocking in a statement: a
+blocked statement holds a snapshot, which `CREATE INDEX CONCURRENTLY` in the migrator would wait
+on while the waiter waits on the migrator.
+Worker startup only calls `check()`, a single SELECT on the version table.
+
+Released migrations are never edited: each one defines the tables and indexes it creates
+(`_baseline` for version 1, the schema when versioning was introduced) instead of reading the
+current models, and a schema change is a new version. Databases created while version 1 still
+built the models as then declared may already have later objects, so migrations after it must
+be no-ops against them (`IF NOT EXISTS`, `checkfirst=True`).
+
+A migration marked `transactional=False` (e.g. `CREATE INDEX CONCURRENTLY`, which Postgres refuses
+inside a transaction block) runs on the autocommit lock connection and is recorded afterwards,
+so it must be safe to re-run after failing partway.
+
+    python -m app.migrations status
+    python -m app.migrations upgrade
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    column,
+    func,
+    insert,
+    inspect,
+    select,
+    table,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import engine
+from app.finance import rollups
+
+logger = logging.getLogger(__name__)
+
+# Distinct from rollups.REBUILD_LOCK_ID.
+MIGRATION_LOCK_ID = 0x4D696772
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+# The schema version 1 creates, frozen as the models stood when versioning was introduced.
+_baseline = MetaData()
+
+_users = Table(
+    "users",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("username", String, unique=True, index=True, nullable=True),
+    Column("first_name", String, nullable=True),
+    Column("last_name", String, nullable=True),
+    Column("phone", String, nullable=True),
+    Column("hashed_password", String, nullable=False),
+    Column("email_verified", Boolean, nullable=False, server_default="false"),
+    Column("is_active", Boolean, nullable=False, server_default="false"),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+_email_otps = Table(
+    "email_otps",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("code_salt", String, nullable=False),
+    Column("code_hash", String, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+    Column("consumed_at", DateTime(timezone=True), nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+Index(
+    "ix_email_otps_user_live",
+    _email_otps.c.user_id,
+    _email_otps.c.expires_at.desc(),
+    postgresql_where=_email_otps.c.consumed_at.is_(None),
+)
+Index(
+    "ix_email_otps_consumed",
+    _email_otps.c.consumed_at,
+    postgresql_where=_email_otps.c.consumed_at.is_not(None),
+)
+
+_email_outbox = Table(
+    "email_outbox",
+    _baseline,
+    Column("id", Integer, primary_key=True),
+    Column("to_email", String, nullable=False),
+    Column("subject", String, nullable=False),
+    Column("body", Text, nullable=False),
+    Column("status", String, nullable=False, server_default="pending"),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("next_attempt_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("last_error", String, nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("sent_at", DateTime(timezone=True), nullable=True),
+    Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+)
+
+_categories = Table(
+    "categories",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    UniqueConstraint("user_id", "name", name="uq_user_category_name"),
+)
+
+_transactions = Table(
+    "transactions",
+    _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("category_id", Integer, ForeignKey("categories.id"), nullable=True, index=True),
+    Column("description", String, nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("transaction_type", String, nullable=False),
+    Column("date", Date, nullable=False),
+)
+Index(
+    "ix_transactions_user_date_id",
+    _transactions.c.user_id,
+    _transactions.c.date.desc(),
+    _transactions.c.id.desc(),
+)
+Index(
+    "ix_transactions_user_type_date",
+    _transactions.c.user_id,
+    _transactions.c.transaction_type,
+    _transactions.c.date.desc(),
+    _transactions.c.id.desc(),
+    postgresql_include=["amount", "category_id"],
+)
+Index(
+    "ix_transactions_user_category_date",
+    _transactions.c.user_id,
+    _transactions.c.category_id,
+    _transactions.c.date.desc(),
+    _transactions.c.id.desc(),
+)
+
+Table(
+    "daily_rollups",
+    _baseline,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("day", Date, nullable=False),
+    Column("category_id", Integer, ForeignKey("categories.id"), nullable=True),
+    Column("transaction_type", String, nullable=False),
+    Column("total", Float, nullable=False, server_default="0"),
+    Column("tx_count", Integer, nullable=False, server_default="0"),
+    UniqueConstraint(
+        "user_id",
+        "day",
+        "category_id",
+        "transaction_type",
+        name="uq_daily_rollup_key",
+        postgresql_nulls_not_distinct=True,
+    ),
+)
+
+
+def _create_tables(conn: Connection) -> None:
+    _baseline.create_all(bind=conn)
+
+
+# Columns added to `users` after databases were first created with `create_all()`.
+_LEGACY_USER_COLUMNS = {
+    "first_name": "VARCHAR",
+    "last_name": "VARCHAR",
+    "username": "VARCHAR",
+    "phone": "VARCHAR",
+    "email_verified": "BOOLEAN NOT NULL DEFAULT FALSE",
+    "is_active": "BOOLEAN NOT NULL DEFAULT FALSE",
+    "created_at": "TIMESTAMPTZ NOT NULL DEFAULT NOW()",
+}
+
+
+def _upgrade_legacy_schema(conn: Connection) -> None:
+    """What `ensure_schema()` used to do on every boot, for databases that predate versioning."""
+
+    existing = {col["name"] for col in inspect(conn).get_columns("users")}
+    for name, ddl in _LEGACY_USER_COLUMNS.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {ddl}"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)"))
+    # `create_all()` only creates indexes together with a new table; add ones declared later.
+    for table in _baseline.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _backfill_rollups(conn: Connection) -> None:
+    # A savepoint, so the backfill's own commit/rollback stays inside this migration's transaction.
+    with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+        rollups.backfill_if_empty(db)
+
+
+def _create_index_concurrently(conn: Connection, name: str, definition: str) -> None:
+    """`CREATE INDEX CONCURRENTLY name ON definition` on Postgres; a plain build elsewhere."""
+
+    if not _is_postgres(conn):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+        return
+    # An interrupted concurrent build leaves an invalid index behind that IF NOT EXISTS would keep.
+    invalid = conn.execute(
+        text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+
+CHANGE_SEQ_BACKFILL_BATCH = 10_000
+
+# The tables version 4 adds, as it released them.
+_delta_sync = MetaData()
+
+_change_counters = Table(
+    "finance_change_counters",
+    _delta_sync,
+    Column("user_id", Integer, ForeignKey(_users.c.id), primary_key=True),
+    Column("seq", BigInteger, nullable=False, server_default="0"),
+    Column("compacted_seq", BigInteger, nullable=False, server_default="0"),
+)
+
+_tombstones = Table(
+    "finance_tombstones",
+    _delta_sync,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey(_users.c.id), nullable=False),
+    Column("entity", String, nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("change_seq", BigInteger, nullable=False),
+    Column("deleted_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_finance_tombstones_user_change_seq", "user_id", "change_seq"),
+    Index("ix_finance_tombstones_deleted_at", "deleted_at"),
+)
+
+
+def _add_change_sequences(conn: Connection) -> None:
+    """
+    Delta sync: `change_seq` columns, per-user counters and tombstones.
+
+    Non-transactional, so no lock outlives its step: the ALTER (a catalog-only change on
+    Postgres 11+) commits at once, existing rows are numbered in short id-range batches and the
+    indexes are built concurrently.
+    """
+
+    sequences = []
+    for name in ("transactions", "categories"):
+        if "change_seq" not in {col["name"] for col in inspect(conn).get_columns(name)}:
+            conn.execute(
+                text(f"ALTER TABLE {name} ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0")
+            )
+        rows = table(name, column("id"), column("user_id"), column("change_seq"))
+        # Existing rows are numbered by id; each user's counter starts above them below.
+        max_id = conn.execute(select(func.max(rows.c.id))).scalar() or 0
+        for low in range(0, max_id, CHANGE_SEQ_BACKFILL_BATCH):
+            conn.execute(
+                update(rows)
+                .where(
+                    rows.c.id > low,
+                    rows.c.id <= low + CHANGE_SEQ_BACKFILL_BATCH,
+                    rows.c.change_seq == 0,
+                )
+                .values(change_seq=rows.c.id)
+            )
+        _create_index_concurrently(
+            conn, f"ix_{name}_user_change_seq", f"{name} (user_id, change_seq)"
+        )
+        sequences.append(select(rows.c.user_id, rows.c.change_seq))
+    _delta_sync.create_all(bind=conn)
+
+    numbered = union_all(*sequences).subquery()
+    conn.execute(
+        insert(_change_counters).from_select(
+            ["user_id", "seq"],
+            select(numbered.c.user_id, func.max(numbered.c.change_seq))
+            .where(numbered.c.user_id.not_in(select(_change_counters.c.user_id)))
+            .group_by(numbered.c.user_id),
+        )
+    )
+
+DESCRIPTION_SEARCH_INDEX = "ix_transactions_user_description_trgm"
+
+
+def _add_description_search_index(conn: Connection) -> None:
+    """
+    Trigram GIN index for transaction search, led by `user_id` (through btree_gin) so a search
+    only reads the caller's postings. Postgres maintains it on every insert and update.
+    """
+
+    if not _is_postgres(conn):
+        # SQLite (local development) searches with a LIKE scan over the user's rows.
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+    # Concurrently: building it over a large ledger must not block writes to `transactions`.
+    _create_index_concurrently(
+        conn, DESCRIPTION_SEARCH_INDEX, "transactions USING gin (user_id, description gin_trgm_ops)"
+    )
+
+
+MIGRATIONS = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "upgrade pre-versioning schema", _upgrade_legacy_schema),
+    Migration(3, "backfill daily rollups", _backfill_rollups),
+    Migration(4, "delta sync change sequences", _add_change_sequences, transactional=False),
+    Migration(
+        5,
+        "transaction description search index",
+        _add_description_search_index,
+        transactional=False,
+    ),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(bind: Engine = engine) -> int:
+    """The applied schema version; 0 for a database that has never been migrated."""
+
+    with bind.connect() as conn:
+        try:
+            return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            # No version table yet (undefined table on Postgres, "no such table" on SQLite).
+            return 0
+
+
+def _is_postgres(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def migrate(bind: Engine = engine) -> list[int]:
+    """Apply pending migrations under the migration lock. Returns the versions applied."""
+
+    applied: list[int] = []
+    with bind.connect() as lock_conn, bind.connect() as conn:
+        # Holds the session-level lock across the per-migration transactions on `conn`, and runs
+        # non-transactional migrations. Autocommit, so it never sits in an open transaction.
+        lock_conn = lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        if _is_postgres(conn):
+            try_lock = select(func.pg_try_advisory_lock(MIGRATION_LOCK_ID))
+            while not lock_conn.execute(try_lock).scalar():
+                time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+        try:
+            schema_migrations.create(conn, checkfirst=True)
+            conn.commit()
+            # Read after taking the lock: whoever held it before us may have done the work.
+            version = conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+            conn.commit()
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                if not migration.transactional:
+                    migration.upgrade(lock_conn)
+                with conn.begin():
+                    if migration.transactional:
+                        migration.upgrade(conn)
+                    conn.execute(
+                        insert(schema_migrations).values(
+                            version=migration.version, name=migration.name
+                        )
+                    )
+                logger.info("Applied migration %s: %s", migration.version, migration.name)
+                applied.append(migration.version)
+        finally:
+            if _is_postgres(conn):
+                lock_conn.execute(select(func.pg_advisory_unlock(MIGRATION_LOCK_ID)))
+    return applied
+
+
+def check() -> None:
+    """Startup check: migrates only when behind and `DB_AUTO_MIGRATE` is on."""
+
+    version = current_version()
+    if version == LATEST_VERSION:
+        return
+    if version > LATEST_VERSION:
+        # Expected mid-deploy: migrations ran ahead of this (older) code and are additive.
+        logger.warning(
+            "Database schema is at version %s, newer than this code's %s", version, LATEST_VERSION
+        )
+        return
+    if not settings.db_auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}; "
+            "run `python -m app.migrations upgrade`"
+        )
+    migrate()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Show or apply database schema migrations.")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        applied = migrate()
+        print(f"Applied {len(applied)} migration(s); schema is at version {current_version()}.")
+        return 0
+
+    version = current_version()
+    print(f"Schema version {version}, latest {LATEST_VERSION}.")
+    for migration in MIGRATIONS:
+        if migration.version > version:
+            print(f"pending: {migration.version} {migration.name}")
+    # Non-zero while migrations are pending, for deploy scripts.
+    return 1 if version < LATEST_VERSION else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,10 +15,9 @@ import {
   createCategory,
   createTransaction,
   deleteTransaction,
-  getCategoryBreakdown,
-  getSummary,
+  getDashboardReport,
+  listAllTransactions,
   listCategories,
-  listTransactions,
   updateTransaction
 } from "./api/finance.js";
 import BottomNav from "./components/BottomNav.jsx";
@@ -295,16 +294,15 @@ export default function App() {
         category_id: filters.categoryId || undefined,
         transaction_type: filters.type || undefined
       };
-      const [cats, txs, sum, catsBreakdown] = await Promise.all([
+      const [cats, txs, dashboard] = await Promise.all([
         listCategories(),
-        listTransactions(params),
-        getSummary({ start_date: filters.start, end_date: filters.end }),
-        getCategoryBreakdown({ start_date: filters.start, end_date: filters.end })
+        listAllTransactions(params),
+        getDashboardReport({ start_date: filters.start, end_date: filters.end })
       ]);
       setCategories(cats);
       setTransactions(txs);
-      setSummary(sum);
-      setBreakdown(catsBreakdown);
+      setSummary(dashboard.summary);
+      setBreakdown(dashboard.category_breakdown);
     } catch (err) {
       if (err.status === 401) {
         handleLogout();
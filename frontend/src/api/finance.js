@@ -21,6 +21,18 @@ export const createCategory = (name) =>
 export const listTransactions = (params) =>
   request(`/finance/transactions${buildQuery(params)}`);
 
+// Follows `next_cursor` until the last page and returns the flattened rows.
+export const listAllTransactions = async (params = {}) => {
+  const items = [];
+  let cursor;
+  do {
+    const page = await listTransactions({ ...params, limit: 500, cursor });
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+};
+
 export const createTransaction = (payload) =>
   request("/finance/transactions", {
     method: "POST",
@@ -43,3 +55,6 @@ export const getSummary = (params) =>
 
 export const getCategoryBreakdown = (params) =>
   request(`/finance/reports/category-breakdown${buildQuery(params)}`);
+
+export const getDashboardReport = (params) =>
+  request(`/finance/reports/dashboard${buildQuery(params)}`);